@@ -1,8 +1,10 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import scienceplots
 
+from mlperf_power import render
+from mlperf_power.specs import values
+
 # Use the 'science' style from scienceplots with 'no-latex' to avoid requiring LaTeX installation
 plt.rcParams['text.usetex'] = False
 plt.style.use(['science', 'no-latex'])
@@ -16,16 +18,8 @@ plt.rcParams.update({
 # v2.0 - 2.0-132
 # v3.0 - 3.0-0101
 # v3.1 - 3.1-0127
-# Define your new data manually since it's provided in the screenshot
-data = {
-    "ResNet Version": ["v1.1", "v2.0", "v3.0", "v3.1"],
-    "perf/power": [1, 1.097595568, 1.136507966, 1.277909616],
-    "perf score": [1, 0.9118800273, 0.9644309686, 0.9875033259],
-    "power score": [1, 0.83079784, 0.8485914729, 0.7727489591]
-}
-
-# Convert the data into a DataFrame
-df = pd.DataFrame(data)
+# Scores relative to v1.1, listed with their submissions in mlperf_power/specs.py
+df = values('figure11a').rename_axis('ResNet Version').reset_index()
 
 # Plotting the bar chart
 fig, ax = plt.subplots(figsize=(11, 6))
@@ -73,8 +67,8 @@ add_value_labels(bars1)
 add_value_labels(bars2)
 add_value_labels(bars3)
 
-fig.tight_layout()
+render.tight_layout(fig)
 
-plt.savefig('./figures/figure11a.png', dpi=300)
+render.savefig('./figures/figure11a.png')
 
 #plt.show()
@@ -3,6 +3,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 import scienceplots
 
+from mlperf_power import render
+
 # Use the 'science' style from scienceplots with 'no-latex' to avoid requiring LaTeX installation
 plt.rcParams['text.usetex'] = False
 plt.style.use(['science', 'no-latex'])
@@ -71,8 +73,8 @@ add_value_labels(bars1)
 add_value_labels(bars2)
 add_value_labels(bars3)
 
-fig.tight_layout()
+render.tight_layout(fig)
 
-plt.savefig('./figures/figure11b.png', dpi=300)
+render.savefig('./figures/figure11b.png')
 
 #plt.show()
@@ -2,6 +2,9 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import scienceplots
 
+from mlperf_power import render
+from mlperf_power.loader import read_csv
+
 # Use the scienceplots style
 plt.rcParams['text.usetex'] = False
 plt.style.use(['science', 'no-latex'])
@@ -11,8 +14,7 @@ plt.rcParams.update({
 })
 
 # Load the CSV performance data from MLPerf inference
-file_path = './code/data_performance.csv'
-df = pd.read_csv(file_path, index_col=0)
+df = read_csv('data_performance.csv', index_col=0)
 
 # Transpose the DataFrame so that dates are the index
 df_clean = df.T
@@ -100,9 +102,9 @@ ax_bottom.set_ylabel('Normalized Performance')
 ax_bottom.legend(loc='upper center', bbox_to_anchor=(0.5, 1.4), ncol=4, fontsize=20, frameon=False)
 
 # Adjust layout to prevent clipping of tick-labels
-plt.tight_layout(rect=[0, 0, 1, 0.95])  # Reduce the top space
+render.tight_layout(rect=[0, 0, 1, 0.95])  # Reduce the top space
 
-plt.savefig('./figures/figure1.png', dpi=300)
+render.savefig('./figures/figure1.png')
 
 # Display the plot
 #plt.show()
@@ -1,8 +1,10 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import scienceplots
 
+from mlperf_power import render
+from mlperf_power.leaderboard import leaderboard
+
 plt.rcParams['text.usetex'] = False
 plt.style.use(['science', 'no-latex'])
 plt.rcParams.update({
@@ -10,95 +12,50 @@ plt.rcParams.update({
     "font.size": 26           # specify font size here
 })
 
-# TINY DATA
-file_path = './code/data_cleaned_tiny.csv'
-df = pd.read_csv(file_path)
-
-# Filter for 'Server' scenario and specified models
-desired_models = ['MobileNetV1 (0.25x)', 'ResNet-V1', 'DSCNN', 'FC AutoEncoder']
-df = df[(df['Model MLC'].isin([model for model in desired_models]))]
-
-# Filter the DataFrame for rows containing performance and power data
-performance_df = df[df['Units'].isin(['Latency in ms'])].copy()
-power_df = df[df['Units'].isin(['Energy in uJ']) & df['Result'].str.match(r'^\d+(\.\d+)?$')].copy()
+# Min and max power come from the materialized records of each division
 
-# Clean and convert the 'Result' column to float
-performance_df['Result'] = performance_df['Result'].apply(lambda x: float(x.replace(",", "").replace('"', "")))
-power_df['Result'] = power_df['Result'].apply(lambda x: float(x.replace(",", "").replace('"', "")))
+# TINY DATA
+df = leaderboard('tiny')
 
-# Merge performance and power data on common columns
-merged_df = pd.merge(performance_df, power_df, on=['Public ID', 'Model MLC', 'Scenario', 'version', 'date'], suffixes=('_perf', '_power'))
+# Filter for specified models
+desired_models = ['mobilenetv1 (0.25x)', 'resnet-v1', 'dscnn', 'fc autoencoder']
+df = df[df['Model MLC'].isin(desired_models)]
 
-# Calculate the energy/latency metric
-merged_df['Energy/Latency'] = merged_df['Result_power'] / (1000 * merged_df['Result_perf'])
-tiny_data = merged_df['Energy/Latency'].to_numpy()
+# Energy per inference over latency gives the average power
+tiny_data = df
 
 
 
 # EDGE DATA
-file_path = './code/data_cleaned_inference_edge.csv'
-df = pd.read_csv(file_path)
-
-df['Model MLC'] = df['Model MLC'].str.lower().replace({'rnnt': 'rnn-t'})
-df['Model MLC'] = df['Model MLC'].str.lower().replace({'bert-99': 'bert-99.0'})
+df = leaderboard('edge')
 
+# Filter for 'Offline' scenario
 df = df[(df['Scenario'].str.lower().replace(" ", "") == 'offline')]
-
-# Filter the DataFrame for rows containing performance and power data
-performance_df = df[df['Units'].isin(['queries/s', 'samples/s', 'Samples/s', 'Queries/s'])].copy()
-power_df = df[df['Units'].isin(['System Power (W)', 'Power (W)', 'System Power', 'Watts']) & ~df['Result'].str.contains('http', case=False)].copy()
-
-power_df['Result'] = pd.to_numeric(power_df['Result'], errors='coerce')
-edge_data = power_df['Result'].to_numpy()
+edge_data = df
 
 
 
 # DATACENTER DATA
-file_path = './code/data_cleaned_inference_datacenter.csv' 
-df = pd.read_csv(file_path)
-
-df['Model MLC'] = df['Model MLC'].str.lower().replace({'rnnt': 'rnn-t'})
-df['Model MLC'] = df['Model MLC'].str.lower().replace({'bert': 'bert-99.0'})
+df = leaderboard('datacenter')
 
-# Filter for 'Server' scenario and specified models
+# Filter for 'Offline' scenario
 df = df[(df['Scenario'].str.lower() == 'offline')]
-
-# Filter the DataFrame for rows containing performance and power data
-performance_df = df[df['Units'].isin(['queries/s', 'samples/s', 'Samples/s', 'Queries/s'])].copy()
-power_df = df[df['Units'].isin(['System Power (W)', 'Power (W)', 'System Power', 'Watts'])].copy()
-power_df['Result'] = pd.to_numeric(power_df['Result'], errors='coerce')
-
-# Handle NaN values (e.g., remove or fill them)
-power_df = power_df.dropna(subset=['Result'])
-datacenter_data = power_df['Result'].to_numpy()
+datacenter_data = df
 
 
 
 # TRAINING DATA
-file_path = './code/data_cleaned_training.csv'
-df = pd.read_csv(file_path)
-
-# Filter the DataFrame for rows containing performance and power data
-performance_df = df[df['Units'].isin(['Latency (In minutes)'])].copy()
-power_df = df[df['Units'].isin(['kJ'])].copy()
-
-# Clean and convert the 'Result' column to float
-performance_df['Result'] = performance_df['Avg. Result at System Name'].apply(lambda x: float(x.replace(",", "").replace('"', "")))
-power_df['Result'] = power_df['Avg. Result at System Name'].apply(lambda x: float(x.replace(",", "").replace('"', "")))
-
-# Merge performance and power data on common columns
-merged_df = pd.merge(performance_df, power_df, on=['Public ID', 'Model MLC'], suffixes=('_perf', '_power'))
+df = leaderboard('training')
 
-# Calculate the energy/latency metric
-merged_df['Energy/Latency'] = merged_df['Result_power'] * 1000 / (60 * merged_df['Result_perf'])
-train_data = merged_df['Energy/Latency'].to_numpy()
+# Energy per run over time-to-train gives the average power
+train_data = df
 
 # Calculate min and max values for each dataset
 data_labels = ['Tiny', 'Edge', 'Datacenter', 'Training']
 data_sets = [tiny_data, edge_data, datacenter_data, train_data]
 
-min_values = [np.min(data) for data in data_sets]
-max_values = [np.max(data) for data in data_sets]
+min_values = [data['min_power_W'].min() for data in data_sets]
+max_values = [data['max_power_W'].max() for data in data_sets]
 
 # Adjust the max value for datacenter if it's less than 6280.21W
 if max_values[2] < 6280.21:
@@ -160,10 +117,10 @@ add_value_labels(bars2, fontsize=18)
 ax.tick_params(axis='y', labelsize=20)
 
 
-fig.tight_layout()
+render.tight_layout(fig)
 plt.yscale('log')
 
-plt.savefig('./figures/figure2.png', dpi=300)
+render.savefig('./figures/figure2.png')
 
 
 #plt.show()
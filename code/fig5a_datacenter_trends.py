@@ -1,10 +1,13 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-import re
 from matplotlib.ticker import FuncFormatter, LogLocator
 import scienceplots
 
+from mlperf_power import render
+from mlperf_power.leaderboard import leaderboard
+from mlperf_power.trends import efficiency_frontier, label_models
+
 # Set up the style
 plt.style.use(['science', 'no-latex'])
 plt.rcParams.update({
@@ -12,41 +15,30 @@ plt.rcParams.update({
     "font.size": 35           # specify font size here
 })
 
-file_path = './code/data_cleaned_inference_datacenter.csv'
-df = pd.read_csv(file_path)
+# Versions covered in the paper, rounds added to the store later are not read
+paper_versions = ['v1.0', 'v1.1', 'v2.0', 'v2.1', 'v3.0', 'v3.1', 'v4.0', 'v4.1']
 
-# Standardize model names
-df['Model MLC'] = df['Model MLC'].str.lower().replace({'rnnt': 'rnn-t'})
-df['Model MLC'] = df['Model MLC'].str.lower().replace({'bert': 'bert-99.0'})
+# Materialized per-version efficiency records with standardized model names
+df = leaderboard('datacenter', model_aliases={'rnnt': 'rnn-t', 'bert': 'bert-99.0'}, versions=paper_versions)
 
 # Desired models (substrings to match in 'Model MLC')
 desired_models = ['RetinaNet', 'BERT-99.0', 'ResNet', 'RNN-T', 'GPTJ-99.0', 'DLRM-v2-99.0', 'Llama2-70b-99.9']
 
-# Create a regex pattern that matches any of the desired models, case insensitive
-pattern = '|'.join([re.escape(model.lower()) for model in desired_models])
+# Label each row with the desired model it matches, case insensitive
+df['Benchmark'] = label_models(df['Model MLC'], desired_models)
 
 # Filter for 'offline' scenario and models matching the desired substrings
-df = df[(df['Scenario'].str.lower() == 'offline') & df['Model MLC'].str.contains(pattern, case=False)]
-
-# Convert 'Result' to numeric, handling errors (like non-numeric strings)
-df['Result'] = pd.to_numeric(df['Result'].str.replace(",", "").replace('"', ''), errors='coerce')
-
-# Adjust 'Result' if 'Units' is 'Tokens/s'
-df.loc[df['Units'].str.contains('Tokens/s', case=False), 'Result'] = df.loc[df['Units'].str.contains('Tokens/s', case=False), 'Result'] / 292
-
-# Filter the DataFrame for rows containing performance and power data
-performance_df = df[df['Units'].isin(['queries/s', 'samples/s', 'Samples/s', 'Queries/s', 'Tokens/s'])].copy()
-power_df = df[df['Units'].isin(['System Power (W)', 'Power (W)', 'System Power', 'Watts'])].copy()
+merged_df = df[(df['Scenario'].str.lower() == 'offline') & df['Benchmark'].notna()].copy()
 
-# Convert the 'date' field to datetime format
-performance_df['date'] = pd.to_datetime(performance_df['date'])
-power_df['date'] = pd.to_datetime(power_df['date'])
+# Best performance/power of each version (Tokens/s results are converted to samples/s on load)
+merged_df['Performance/Power'] = merged_df['best_samples_per_J']
 
-# Merge performance and power data on common columns
-merged_df = pd.merge(performance_df, power_df, on=['Public ID', 'Model MLC', 'Scenario', 'version', 'date'], suffixes=('_perf', '_power'))
+# Best Performance/Power per version, carried forward so there is no negative slope
+frontier = efficiency_frontier(merged_df, value='Performance/Power', by='Benchmark', id_column='best_id')
 
-# Calculate the performance/power metric
-merged_df['Performance/Power'] = merged_df['Result_perf'] / merged_df['Result_power']
+# Normalize the Performance/Power values to 1 for the first version of each model
+first = frontier.groupby('Benchmark', observed=True)['frontier'].transform('first')
+frontier['Normalized Performance/Power'] = frontier['frontier'] / first
 
 # Set up the figure and axis
 fig, ax = plt.subplots(figsize=(14, 8))
@@ -57,23 +49,7 @@ colors = ['blue', 'red', 'green', 'purple', 'orange', 'brown', 'grey']
 
 # Iterate over each model to plot the data
 for i, model in enumerate(desired_models):
-    # Match models using a case-insensitive approach
-    model_data = merged_df[merged_df['Model MLC'].str.contains(model.lower(), case=False)]
-
-    
-    # Group by version and date, and take the maximum Performance/Power value for each group
-    grouped = model_data.groupby(['version', 'date'])['Performance/Power'].apply(lambda x: x.max()).reset_index()
-
-    # Ensure no negative slope
-    max_perf_power = grouped['Performance/Power'].iloc[0]
-    for j in range(1, len(grouped)):
-        if grouped['Performance/Power'].iloc[j] < max_perf_power:
-            grouped.at[j, 'Performance/Power'] = max_perf_power
-        else:
-            max_perf_power = grouped['Performance/Power'].iloc[j]
-
-    # Normalize the Performance/Power values to 1 for the first version of each model
-    grouped['Normalized Performance/Power'] = grouped['Performance/Power'] / grouped['Performance/Power'].iloc[0]
+    grouped = frontier[frontier['Benchmark'] == model].reset_index(drop=True)
 
     # Handle the case where only a single data point is available by forcing it to plot
     if len(grouped) == 1:
@@ -90,7 +66,7 @@ ax.set_xlim(all_dates.min() - padding, all_dates.max() + padding)
 
 # Set up the bottom X-axis for versions
 versions = merged_df['version'].unique()
-version_dates = merged_df.groupby('version')['date'].min()
+version_dates = merged_df.groupby('version', observed=True)['date'].min()
 ax.set_xticks(version_dates)
 ax.set_xticklabels(version_dates.index, fontsize=28, rotation=45)
 
@@ -122,10 +98,10 @@ ax.tick_params(axis='y', labelsize=28)
 ax.legend(title='Benchmark', fontsize=24)
 
 # Adjust layout to prevent clipping
-plt.tight_layout()
+render.tight_layout()
 
 # Save the figure as an image file (optional)
-plt.savefig('./figures/figure5a.png', dpi=300)
+render.savefig('./figures/figure5a.png')
 
 # Show the plot
 #plt.show()
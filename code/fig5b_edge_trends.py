@@ -3,6 +3,10 @@ import matplotlib.pyplot as plt
 import scipy.stats as stats
 import scienceplots
 
+from mlperf_power import render
+from mlperf_power.leaderboard import leaderboard
+from mlperf_power.trends import efficiency_frontier, label_models
+
 # Set up the style
 plt.style.use(['science', 'no-latex'])
 plt.rcParams.update({
@@ -10,38 +14,27 @@ plt.rcParams.update({
     "font.size": 35           # specify font size here
 })
 
-file_path = './code/data_cleaned_inference_edge.csv' 
-df = pd.read_csv(file_path)
-
-# Standardize model names
-df['Model MLC'] = df['Model MLC'].str.lower().replace({'rnnt': 'rnn-t'})
-df['Model MLC'] = df['Model MLC'].str.lower().replace({'bert-99': 'bert-99.0'})
+# Materialized per-version efficiency records with standardized model names
+df = leaderboard('edge', model_aliases={'rnnt': 'rnn-t', 'bert-99': 'bert-99.0'})
 
 # Filter for 'offline' scenario and specified models
 desired_models = ['RetinaNet', 'BERT-99.0', 'ResNet', 'RNN-T']
-df = df[(df['Scenario'].str.lower().replace(" ", "") == 'offline') & (df['Model MLC'].isin([model.lower() for model in desired_models]))]
+df['Benchmark'] = label_models(df['Model MLC'], desired_models, exact=True)
+merged_df = df[(df['Scenario'].str.lower().replace(" ", "") == 'offline') & df['Benchmark'].notna()].copy()
 
 # Function to calculate geometric mean
 def geometric_mean(arr):
     return stats.gmean(arr)
 
-# Filter the DataFrame for rows containing performance and power data
-performance_df = df[df['Units'].isin(['queries/s', 'samples/s', 'Samples/s', 'Queries/s'])].copy()
-power_df = df[df['Units'].isin(['System Power (W)', 'Power (W)', 'System Power', 'Watts']) & ~df['Result'].str.contains('http', case=False)].copy()
-
-# Clean and convert the 'Result' column to float
-performance_df['Result'] = performance_df['Result'].apply(lambda x: float(x.replace(",", "").replace('"', "")))
-power_df['Result'] = power_df['Result'].apply(lambda x: float(x.replace(",", "").replace('"', "")))
+# Best performance/power of each version
+merged_df['Performance/Power'] = merged_df['best_samples_per_J']
 
-# Convert the 'date' field to datetime format
-performance_df['date'] = pd.to_datetime(performance_df['date'])
-power_df['date'] = pd.to_datetime(power_df['date'])
+# Best Performance/Power per version, carried forward so there is no negative slope
+frontier = efficiency_frontier(merged_df, value='Performance/Power', by='Benchmark', id_column='best_id')
 
-# Merge performance and power data on common columns
-merged_df = pd.merge(performance_df, power_df, on=['Public ID', 'Model MLC', 'Scenario', 'version', 'date'], suffixes=('_perf', '_power'))
-
-# Calculate the performance/power metric
-merged_df['Performance/Power'] = merged_df['Result_perf'] / merged_df['Result_power']
+# Normalize the Performance/Power values to 1 for the first version of each model
+first = frontier.groupby('Benchmark', observed=True)['frontier'].transform('first')
+frontier['Normalized Performance/Power'] = frontier['frontier'] / first
 
 # Set up the figure and axis
 fig, ax = plt.subplots(figsize=(14, 8))
@@ -51,20 +44,7 @@ markers = ['o', 's', 'D', 'P']
 colors = plt.cm.tab10.colors  # Use a colormap for consistent colors
 
 for i, model in enumerate(desired_models):
-    model_data = merged_df[merged_df['Model MLC'] == model.lower()]
-    
-    grouped = model_data.groupby(['version', 'date'])['Performance/Power'].apply(lambda x: x.max()).reset_index()
-
-    # Ensure no negative slope
-    max_perf_power = grouped['Performance/Power'].iloc[0]
-    for j in range(1, len(grouped)):
-        if grouped['Performance/Power'].iloc[j] < max_perf_power:
-            grouped.at[j, 'Performance/Power'] = max_perf_power
-        else:
-            max_perf_power = grouped['Performance/Power'].iloc[j]
-
-    # Normalize the Performance/Power values to 1 for the first version of each model
-    grouped['Normalized Performance/Power'] = grouped['Performance/Power'] / grouped['Performance/Power'].iloc[0]
+    grouped = frontier[frontier['Benchmark'] == model]
 
     # Plot the data
     ax.plot(grouped['date'], grouped['Normalized Performance/Power'], 
@@ -77,7 +57,7 @@ ax.set_xlim(all_dates.min() - padding, all_dates.max() + padding)
 
 # Set up the bottom X-axis for versions
 versions = merged_df['version'].unique()
-version_dates = merged_df.groupby('version')['date'].min()
+version_dates = merged_df.groupby('version', observed=True)['date'].min()
 ax.set_xticks(version_dates)
 ax.set_xticklabels(version_dates.index, fontsize=28, rotation=45)
 
@@ -106,10 +86,10 @@ ax.legend(title='Benchmark', fontsize=24)
 ax.tick_params(axis='y', labelsize=28)
 
 # Adjust layout to prevent clipping
-plt.tight_layout()
+render.tight_layout()
 
 # Save the figure as an image file (optional)
-plt.savefig('./figures/figure5b.png', dpi=300)
+render.savefig('./figures/figure5b.png')
 
 # Show the plot
 #plt.show()
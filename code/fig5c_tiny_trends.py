@@ -3,6 +3,10 @@ import matplotlib.pyplot as plt
 import scipy.stats as stats
 import scienceplots
 
+from mlperf_power import render
+from mlperf_power.leaderboard import leaderboard
+from mlperf_power.trends import efficiency_frontier, label_models
+
 # Set up the style
 plt.rcParams['text.usetex'] = False
 plt.style.use(['science', 'no-latex'])
@@ -11,39 +15,31 @@ plt.rcParams.update({
     "font.size": 35           # specify font size here
 })
 
-file_path = './code/data_cleaned_tiny.csv'
-df = pd.read_csv(file_path)
+# Materialized per-version efficiency records of the latency/energy pairs
+df = leaderboard('tiny')
 
 # Desired models (substrings to match in 'Model MLC')
 desired_models = ['MobileNet', 'ResNet', 'DSCNN', 'AutoEncoder']
 
-# Create a regex pattern that matches any of the desired models, case insensitive
-pattern = '|'.join(desired_models)
+# Label each row with the desired model it contains, case insensitive
+df['Benchmark'] = label_models(df['Model MLC'], desired_models)
 
 # Filter the DataFrame to include rows where 'Model MLC' contains any of the desired models as a substring
-df = df[df['Model MLC'].str.contains(pattern, case=False, na=False)]
+merged_df = df[df['Benchmark'].notna()].copy()
 
 # Function to calculate geometric mean
 def geometric_mean(arr):
     return stats.gmean(arr)
 
-# Filter the DataFrame for rows containing performance and power data
-performance_df = df[df['Units'].isin(['Latency in ms'])].copy()
-power_df = df[df['Units'].isin(['Energy in uJ']) & df['Result'].str.match(r'^\d+(\.\d+)?$')].copy()
-
-# Clean and convert the 'Result' column to float
-performance_df['Result'] = performance_df['Result'].apply(lambda x: float(x.replace(",", "").replace('"', "")))
-power_df['Result'] = power_df['Result'].apply(lambda x: float(x.replace(",", "").replace('"', "")))
+# Best performance/power of each version, using 1/energy per inference
+merged_df['Performance/Power'] = merged_df['best_samples_per_J']
 
-# Convert the 'date' field to datetime format
-performance_df['date'] = pd.to_datetime(performance_df['date'])
-power_df['date'] = pd.to_datetime(power_df['date'])
+# Best Performance/Power per version, carried forward so there is no negative slope
+frontier = efficiency_frontier(merged_df, value='Performance/Power', by='Benchmark', id_column='best_id')
 
-# Merge performance and power data on common columns
-merged_df = pd.merge(performance_df, power_df, on=['Public ID', 'Model MLC', 'Scenario', 'version', 'date'], suffixes=('_perf', '_power'))
-
-# Calculate the performance/power metric using 1/latency
-merged_df['Performance/Power'] = 1 / merged_df['Result_power']
+# Normalize the Performance/Power values to 1 for the first version of each model
+first = frontier.groupby('Benchmark', observed=True)['frontier'].transform('first')
+frontier['Normalized Performance/Power'] = frontier['frontier'] / first
 
 # Set up the figure and axis
 fig, ax = plt.subplots(figsize=(14, 8))
@@ -53,23 +49,10 @@ markers = ['o', 's', 'D', 'P', 'X', '^', 'v', '<', '>', 'p']
 colors = plt.cm.tab10.colors  # Use a colormap for consistent colors
 
 for i, model in enumerate(desired_models):
-    model_data = merged_df[merged_df['Model MLC'].str.contains(model, case=False, na=False)]
-    
-    if model_data.empty:
+    grouped = frontier[frontier['Benchmark'] == model]
+
+    if grouped.empty:
         continue
-    
-    grouped = model_data.groupby(['version', 'date'])['Performance/Power'].apply(lambda x: x.max()).reset_index()
-
-    # Ensure no negative slope
-    max_perf_power = grouped['Performance/Power'].iloc[0]
-    for j in range(1, len(grouped)):
-        if grouped['Performance/Power'].iloc[j] < max_perf_power:
-            grouped.at[j, 'Performance/Power'] = max_perf_power
-        else:
-            max_perf_power = grouped['Performance/Power'].iloc[j]
-    
-    # Normalize the Performance/Power values to 1 for the first version of each model
-    grouped['Normalized Performance/Power'] = grouped['Performance/Power'] / grouped['Performance/Power'].iloc[0]
 
     # Plot the data
     ax.plot(grouped['date'], grouped['Normalized Performance/Power'], 
@@ -82,7 +65,7 @@ ax.set_xlim(all_dates.min() - padding, all_dates.max() + padding)
 
 # Set up the bottom X-axis for versions
 versions = merged_df['version'].unique()
-version_dates = merged_df.groupby('version')['date'].min()
+version_dates = merged_df.groupby('version', observed=True)['date'].min()
 ax.set_xticks(version_dates)
 ax.set_xticklabels(version_dates.index, fontsize=28, rotation=45)
 
@@ -108,10 +91,10 @@ ax.legend(title='Benchmark', fontsize=24)
 ax.tick_params(axis='y', labelsize=28)
 
 # Adjust layout to prevent clipping
-plt.tight_layout()
+render.tight_layout()
 
 # Save the figure as an image file
-plt.savefig('./figures/figure5c.png', dpi=300)
+render.savefig('./figures/figure5c.png')
 
 # Show the plot
 #plt.show()
@@ -2,6 +2,9 @@ import matplotlib.pyplot as plt
 import numpy as np
 import scienceplots
 
+from mlperf_power import render
+from mlperf_power.specs import values
+
 # Apply the scienceplots style
 plt.rcParams['text.usetex'] = False
 plt.style.use(['science', 'no-latex'])
@@ -10,11 +13,13 @@ plt.rcParams.update({
     "font.size": 24           # specify font size here
 })
 
-# Data from MLPerf Training v4.0 logs (submissions 4.0-0090 - 4.0-0097)
-accelerators = [8, 64, 512]
-compute_energy = [11.77, 15.08, 38.64]
-interconnect_energy = [0.0, 5.3, 7.2]
-time_to_train = [29.101, 5.488, 2.015]
+# Llama2-70B LoRA fine-tuning in MLPerf Training v4.0 (submissions 4.0-0090 - 4.0-0097),
+# resolved from the store by the spec in mlperf_power/specs.py
+spec = values('figure6')
+accelerators = spec.index.tolist()
+interconnect_energy = spec['interconnect_MJ'].tolist()
+compute_energy = (spec['energy_MJ'] - spec['interconnect_MJ']).tolist()
+time_to_train = spec['time_to_train_min'].tolist()
 
 # Creating the bar plot
 bar_width = 0.35
@@ -51,9 +56,9 @@ ax1.legend(handles, labels, loc='upper center', bbox_to_anchor=(0.5, 1.15), ncol
            handletextpad=0.5, columnspacing=0.7)
 
 # Adjust layout to fit everything
-plt.tight_layout(rect=[0, 0, 1, 0.9])
+render.tight_layout(rect=[0, 0, 1, 0.9])
 
-plt.savefig('./figures/figure6.png', dpi=300)
+render.savefig('./figures/figure6.png')
 
 # Show plot
 #plt.show()
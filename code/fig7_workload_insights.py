@@ -2,6 +2,10 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import scienceplots
 
+from mlperf_power import render
+from mlperf_power.specs import resolve
+from mlperf_power.workloads import catalog_lookup
+
 # Apply the scienceplots style
 plt.rcParams['text.usetex'] = False
 plt.style.use(['science', 'no-latex'])
@@ -10,18 +14,25 @@ plt.rcParams.update({
     "font.size": 28
 })
 
+# Energy per sample of each workload, resolved by the spec in mlperf_power/specs.py,
+# and its MACs per sample from the workload catalog
+spec = resolve('figure7').set_index('label')
+spec['MAC'] = catalog_lookup(spec['model'])['macs_per_sample']
+
 # Data from the tiny 1.2-0004
+tiny_workloads = ['AutoEncoder', 'DSCNN', 'MobileNet', 'ResNet Tiny']
 data1 = {
-    'Workload': ['AutoEncoder', 'DSCNN', 'MobileNet', 'ResNet Tiny'],
-    'J/Sample': [5.25*0.000001, 18.56*0.000001, 40.8*0.000001, 27.17*0.000001],
-    'MAC': [264192, 2664768, 7491968, 12534400]
+    'Workload': tiny_workloads,
+    'J/Sample': spec.loc[tiny_workloads, 'value'].tolist(),
+    'MAC': spec.loc[tiny_workloads, 'MAC'].tolist()
 }
 
 # Data from datacenter 4.0-0063
+datacenter_workloads = ['3D UNet-99.9', 'Stable Diffusion', 'DLRM-v2-99.9', 'GPTJ-99.9', 'Llama2-99.9', 'ResNet Inf', 'RetinaNet', 'RNN-T', 'BERT-99.9']
 data2 = {
-    'Workload': ['3D UNet-99.9', 'Stable Diffusion', 'DLRM-v2-99.9', 'GPTJ-99.9', 'Llama2-99.9', 'ResNet Inf', 'RetinaNet', 'RNN-T', 'BERT-99.9'],
-    'J/Sample': [110.4422926, 492.3917098, 0.01981354463, 26.77803242, 0.3815189837*292, 0.008687140755, 0.4549045607, 0.03166273635, 0.1107200351],
-    'MAC': [3.425E+13, 1.35394E+14, 4328225500, 5.3075E+12, 2.32727E+13, 4089282560, 2.01E+11, 6314132597, 59793997800]
+    'Workload': datacenter_workloads,
+    'J/Sample': spec.loc[datacenter_workloads, 'value'].tolist(),
+    'MAC': spec.loc[datacenter_workloads, 'MAC'].tolist()
 }
 
 # Create DataFrames
@@ -114,8 +125,8 @@ workload_legend_elements = [
 ax1.legend(handles=workload_legend_elements + category_legend_elements, loc='upper right', fontsize=20, bbox_to_anchor=(1, 1))
 
 # Adjusting plot for better readability
-fig.tight_layout()
+render.tight_layout(fig)
 
-plt.savefig('./figures/figure7.png', dpi=300)
+render.savefig('./figures/figure7.png')
 
 #plt.show()
@@ -2,6 +2,9 @@ import matplotlib.pyplot as plt
 import numpy as np
 import scienceplots
 
+from mlperf_power import render
+from mlperf_power.specs import values
+
 # Apply the scienceplots style
 plt.rcParams['text.usetex'] = False
 plt.style.use(['science', 'no-latex'])
@@ -17,9 +20,11 @@ plt.rcParams.update({
 # v2.1 - 2.1-0089
 # v3.1 - 3.1-0109
 # v4.0 - 4.0-0063
-versions = ['v1.0', 'v1.1', 'v2.0', 'v2.1', 'v3.1', 'v4.0']
-low_accuracy = [1, 1, 1, 1, 1, 1]
-high_accuracy = [0.495, 0.489, 0.483, 0.504, 0.798, 0.854]
+# (listed with their values in mlperf_power/specs.py)
+relative = values('figure9')['relative_samples_per_J']
+versions = relative.index.tolist()
+low_accuracy = [1] * len(versions)
+high_accuracy = relative.tolist()
 
 # Creating the bar plot
 bar_width = 0.35
@@ -42,9 +47,9 @@ ax.set_yticks(np.arange(0, 1.1, 0.25))
 ax.legend(loc='upper center', bbox_to_anchor=(0.5, 1.18), ncol=2)  # ncol=2 for side by side
 
 # Adjust layout to fit everything
-plt.tight_layout(rect=[0, 0, 1, 1])
+render.tight_layout(rect=[0, 0, 1, 1])
 
-plt.savefig('./figures/figure9.png', dpi=300)
+render.savefig('./figures/figure9.png')
 
 # Show plot
 #lt.show()
@@ -0,0 +1 @@
+"""Shared data and figure tooling for the MLPerf Power analysis scripts."""
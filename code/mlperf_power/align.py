@@ -0,0 +1,173 @@
+"""Alignment and summation of multi-channel power traces.
+
+Multi-node training systems are measured per node, shelf or switch, and every
+channel has its own clock and sample rate. The system's power is the sum of the
+channels at common instants: ``align`` resamples every channel of one or more
+traces (see traces.py) onto a regular timeline by linear interpolation and
+sums them, in total and per component.
+
+A channel's component is the part of its name before the first '/', so channels
+named 'compute/node07' and 'interconnect/leaf2' give the compute vs
+interconnect split of Figure 6; ``components`` can map channels explicitly.
+The timeline spans the window that every channel covers. It is processed in
+blocks of ``BLOCK_POINTS`` instants, and each block reads only the records of
+each channel around it from the mapped traces. Memory is bounded by the block
+size times the number of components, whatever the number of channels.
+
+``offsets`` maps channels to the seconds added to their times, for channels
+whose clock differs from the others'; a channel's window is shifted with it.
+
+    PYTHONPATH=code python -m mlperf_power.align node*.ptrace switches.ptrace [--step 0.2]
+                                                 [--offset interconnect/leaf2=-0.35]
+                                                 [--output aligned.csv]
+
+prints the energy of every component over the common window.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .traces import Trace
+
+# Instants resampled at a time
+BLOCK_POINTS = 1 << 16
+
+# Component of channels whose name has no '/'
+DEFAULT_COMPONENT = 'system'
+
+
+def component_of(channel):
+    return channel.split('/', 1)[0] if '/' in channel else DEFAULT_COMPONENT
+
+
+def open_channels(traces, channels=None):
+    """``{channel: (trace, index row)}`` of the channels of ``traces`` (paths or ``Trace``s).
+
+    Channel names must be unique across the traces.
+    """
+    found = {}
+    for trace in traces:
+        trace = trace if isinstance(trace, Trace) else Trace(trace)
+        for channel, row in trace.index.iterrows():
+            if channel in found:
+                raise ValueError(f"Channel '{channel}' is in both {found[channel][0].path} and {trace.path}")
+            found[channel] = (trace, row)
+    if channels is not None:
+        missing = [c for c in channels if c not in found]
+        if missing:
+            raise KeyError(f"No channel(s) {missing} in the traces")
+        found = {c: found[c] for c in channels}
+    return found
+
+
+def common_window(channels, begin=None, end=None, offsets=None):
+    """(begin, end) covered by every channel, narrowed to ``begin``/``end`` if given."""
+    offsets = offsets or {}
+    starts = [row['begin'] + offsets.get(c, 0.0) for c, (_, row) in channels.items() if row['count']]
+    stops = [row['end'] + offsets.get(c, 0.0) for c, (_, row) in channels.items() if row['count']]
+    if len(starts) < len(channels):
+        raise ValueError('Every channel needs at least one sample')
+    lo = max(starts + ([begin] if begin is not None else []))
+    hi = min(stops + ([end] if end is not None else []))
+    if hi < lo:
+        raise ValueError('The channels have no time window in common')
+    return lo, hi
+
+
+def align(traces, step=1.0, channels=None, components=None, begin=None, end=None, offsets=None,
+          block=BLOCK_POINTS):
+    """Frames of 'time', 'total_W' and '<component>_W' on a regular timeline, ``block`` rows at a time.
+
+    ``traces`` are trace paths or ``Trace``s; ``step`` is the timeline interval
+    in seconds, ``components`` maps channels to components (default:
+    ``component_of``) and ``offsets`` maps channels to clock offsets in seconds.
+    """
+    channels = open_channels(traces, channels)
+    offsets = offsets or {}
+    unknown = [c for c in offsets if c not in channels]
+    if unknown:
+        raise KeyError(f"Offsets for channel(s) {unknown} that are not aligned")
+    components = {c: (components or {}).get(c) or component_of(c) for c in channels}
+    names = list(dict.fromkeys(components.values()))
+    rows = {c: names.index(components[c]) for c in channels}
+    lo, hi = common_window(channels, begin, end, offsets)
+    points = int(np.floor((hi - lo) / step + 1e-9)) + 1
+
+    for start in range(0, points, block):
+        time = lo + np.arange(start, min(start + block, points)) * step
+        power = np.zeros((len(names), len(time)))
+        for channel, (trace, _) in channels.items():
+            # The records around the block, so the first and last instants interpolate
+            records = trace.samples(channel)
+            offset = offsets.get(channel, 0.0)
+            ts = records['time']
+            first = max(int(np.searchsorted(ts, time[0] - offset, side='right')) - 1, 0)
+            last = int(np.searchsorted(ts, time[-1] - offset, side='left')) + 1
+            window = records[first:last]
+            power[rows[channel]] += np.interp(time, window['time'] + offset, window['watts'])
+        frame = {'time': time, 'total_W': power.sum(axis=0)}
+        frame.update({f'{name}_W': row for name, row in zip(names, power)})
+        yield pd.DataFrame(frame)
+
+
+def aligned_energy(traces, step=1.0, channels=None, components=None, begin=None, end=None, offsets=None,
+                   block=BLOCK_POINTS):
+    """Energy (J) of the aligned total and of every component over the common window, as a Series.
+
+    The aligned series is integrated with the trapezoid rule, continued across blocks.
+    """
+    energy, previous = None, None
+    for frame in align(traces, step, channels, components, begin, end, offsets, block):
+        time = frame['time'].to_numpy()
+        power = frame.drop(columns='time')
+        columns, power = power.columns, power.to_numpy()
+        if previous is not None:
+            time = np.r_[previous[0], time]
+            power = np.vstack([previous[1], power])
+        part = ((power[1:] + power[:-1]) / 2 * np.diff(time)[:, None]).sum(axis=0)
+        energy = part if energy is None else energy + part
+        previous = (time[-1], power[-1])
+    return pd.Series(energy, index=[c[:-len('_W')] + '_J' for c in columns])
+
+
+def _offset(text):
+    channel, _, seconds = text.rpartition('=')
+    try:
+        if channel:
+            return channel, float(seconds)
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"expected channel=seconds, got '{text}'")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Align the channels of power traces and sum them per component.')
+    parser.add_argument('traces', nargs='+', help='trace files (see mlperf_power.traces)')
+    parser.add_argument('--step', type=float, default=1.0, help='timeline interval in seconds (default: 1)')
+    parser.add_argument('--channel', action='append', help='channel (repeatable, default: all)')
+    parser.add_argument('--offset', action='append', type=_offset, default=[],
+                        help='channel=seconds added to the times of a channel (repeatable)')
+    parser.add_argument('--output', help='also write the aligned series to this CSV')
+    args = parser.parse_args(argv)
+
+    offsets = dict(args.offset)
+    channels = open_channels(args.traces, args.channel)
+    lo, hi = common_window(channels, offsets=offsets)
+    print(f'{len(channels)} channels, common window {hi - lo:.1f} s')
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            for i, frame in enumerate(align(args.traces, args.step, args.channel, offsets=offsets)):
+                frame.to_csv(f, header=i == 0, index=False)
+        print(f'wrote {args.output}')
+    energy = aligned_energy(args.traces, args.step, args.channel, offsets=offsets)
+    table = pd.DataFrame({'energy_MJ': energy * 1e-6, 'share_%': energy / energy['total_J'] * 100})
+    table.index = table.index.str[:-len('_J')]
+    print(table.to_string(float_format='%.4f'))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
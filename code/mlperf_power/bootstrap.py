@@ -0,0 +1,193 @@
+"""Bootstrap confidence intervals for efficiency deltas.
+
+fig10 and fig8 plot distributions of percent changes. ``bootstrap`` attaches
+percentile confidence intervals to their summary statistics:
+
+    median          median percent change
+    mean            arithmetic mean
+    geometric_mean  geometric mean of the growth factors (1 + delta / 100),
+                    reported back as a percent change
+    percent_positive  share of deltas above zero, in percent
+
+Resamples are drawn in NumPy batches (one ``(batch, n)`` index matrix at a time,
+bounded by ``BATCH_ELEMENTS``) and the statistics are computed along the batch
+axis. ``bootstrap_groups`` runs one bootstrap per group, e.g. per (model,
+hardware configuration), and spreads the groups across a process pool when
+there is enough work. Every group gets its own seed derived from ``seed``, so
+results do not depend on the number of workers.
+
+Per-group CIs of the fig10 deltas (``deltas.efficiency_deltas``, the figure's
+selection), from the repository root:
+
+    PYTHONPATH=code python -m mlperf_power.bootstrap --division datacenter --jobs 8
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .deltas import HARDWARE_KEYS, efficiency_deltas
+from .loader import DIVISIONS
+
+
+def _log_growth(x):
+    return np.log1p(x / 100)
+
+
+def _positive(x):
+    return x > 0
+
+
+def _exp_growth(m):
+    return np.expm1(m) * 100
+
+
+def _percent(m):
+    return m * 100
+
+
+# Statistic -> (transform of the values, reduction along the last axis, transform
+# of the result). The first transform is applied once, not to every resample.
+STATISTICS = {
+    'median': (None, np.median, None),
+    'mean': (None, np.mean, None),
+    'geometric_mean': (_log_growth, np.mean, _exp_growth),
+    'percent_positive': (_positive, np.mean, _percent),
+}
+
+# Upper bound on the size of one resample matrix (float64 elements)
+BATCH_ELEMENTS = 2_000_000
+
+# Below this many resampled elements in total the pool costs more than it saves
+PARALLEL_MIN_ELEMENTS = 50_000_000
+
+
+def _check(statistics):
+    unknown = [s for s in statistics if s not in STATISTICS]
+    if unknown:
+        raise ValueError(f"Unknown statistic(s) {unknown}, expected some of {list(STATISTICS)}")
+
+
+def _finish(statistic, reduced):
+    finish = STATISTICS[statistic][2]
+    return reduced if finish is None else finish(reduced)
+
+
+def bootstrap(values, statistics=tuple(STATISTICS), n_resamples=10_000, confidence=0.95, seed=0):
+    """Point estimate and percentile CI of each of ``statistics`` on ``values``.
+
+    Missing values are dropped. Returns ``{statistic: (estimate, low, high)}``;
+    with fewer than two values the interval is missing.
+    """
+    _check(statistics)
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if n == 0:
+        return {s: (np.nan, np.nan, np.nan) for s in statistics}
+    transformed = {s: values if STATISTICS[s][0] is None else STATISTICS[s][0](values) for s in statistics}
+    estimates = {s: float(_finish(s, STATISTICS[s][1](transformed[s], axis=-1))) for s in statistics}
+    if n < 2:
+        return {s: (estimates[s], np.nan, np.nan) for s in statistics}
+
+    rng = np.random.default_rng(seed)
+    batch = max(1, min(n_resamples, BATCH_ELEMENTS // n))
+    samples = {s: np.empty(n_resamples) for s in statistics}
+    for start in range(0, n_resamples, batch):
+        size = min(batch, n_resamples - start)
+        # One index matrix per batch, shared by every statistic
+        index = rng.integers(0, n, size=(size, n))
+        for s in statistics:
+            samples[s][start:start + size] = STATISTICS[s][1](transformed[s][index], axis=-1)
+
+    tail = (1 - confidence) / 2 * 100
+    result = {}
+    for s in statistics:
+        # The final transforms are monotonic, so they commute with the percentiles
+        low, high = _finish(s, np.nanpercentile(samples[s], [tail, 100 - tail]))
+        result[s] = (estimates[s], float(low), float(high))
+    return result
+
+
+def _bootstrap_chunk(args):
+    groups, statistics, n_resamples, confidence = args
+    return [bootstrap(values, statistics, n_resamples, confidence, seed) for values, seed in groups]
+
+
+def bootstrap_groups(df, value, by, statistics=tuple(STATISTICS), n_resamples=10_000,
+                     confidence=0.95, seed=0, jobs=None):
+    """``bootstrap`` of ``value`` in every ``by`` group of ``df``, in long form.
+
+    Returns the ``by`` columns, 'statistic', 'n', 'estimate', 'ci_low' and
+    'ci_high'. Groups are spread over ``jobs`` processes (default: all cores)
+    when the total number of resampled elements makes that worthwhile.
+    """
+    _check(statistics)
+    by = [by] if isinstance(by, str) else list(by)
+    grouped = df.groupby(by, sort=True, observed=True)[value]
+    keys = list(grouped.groups)
+    arrays = [group.to_numpy(dtype=float) for _, group in grouped]
+    seeds = np.random.SeedSequence(seed).spawn(len(arrays))
+
+    work = sum(len(a) for a in arrays) * n_resamples
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(arrays)))
+    if jobs == 1 or work < PARALLEL_MIN_ELEMENTS:
+        results = _bootstrap_chunk((list(zip(arrays, seeds)), statistics, n_resamples, confidence))
+    else:
+        # Interleave groups so every worker gets a similar mix of large and small ones
+        chunks = [list(zip(arrays[i::jobs], seeds[i::jobs])) for i in range(jobs)]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parts = list(pool.map(_bootstrap_chunk, [(c, statistics, n_resamples, confidence) for c in chunks]))
+        results = [None] * len(arrays)
+        for i, part in enumerate(parts):
+            results[i::jobs] = part
+
+    rows = []
+    for key, values, result in zip(keys, arrays, results):
+        key = key if isinstance(key, tuple) else (key,)
+        n = int(np.count_nonzero(~np.isnan(values)))
+        for s in statistics:
+            rows.append((*key, s, n, *result[s]))
+    return pd.DataFrame(rows, columns=by + ['statistic', 'n', 'estimate', 'ci_low', 'ci_high'])
+
+
+def format_summary(result, unit='%'):
+    """One line per statistic: 'median  12.3% [CI 8.1%, 15.0%]'."""
+    return '\n'.join(f'{s:<17} {est:8.1f}{unit} [CI {low:.1f}{unit}, {high:.1f}{unit}]'
+                     for s, (est, low, high) in result.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Bootstrap CIs of the version-to-version efficiency deltas per (model, hardware) group.')
+    parser.add_argument('--division', default='datacenter', choices=sorted(DIVISIONS))
+    parser.add_argument('--scenario', default='offline', help="scenario to keep (default: offline, '' for all)")
+    parser.add_argument('--step', default='major', choices=['major', 'round'])
+    parser.add_argument('--min-delta', type=float, default=-50, help='drop deltas below this percent (default: -50)')
+    parser.add_argument('--resamples', type=int, default=10_000)
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--jobs', type=int, help='worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    deltas = efficiency_deltas(args.division, args.scenario, args.step, args.min_delta)
+
+    overall = bootstrap(deltas['delta_pct'], n_resamples=args.resamples, confidence=args.confidence)
+    print(f'== {args.division}: {len(deltas)} deltas')
+    print(format_summary(overall))
+    groups = bootstrap_groups(deltas, 'delta_pct', ['Model MLC'] + HARDWARE_KEYS, n_resamples=args.resamples,
+                              confidence=args.confidence, jobs=args.jobs)
+    # A single delta has no spread to resample
+    single = groups['n'] < 2
+    print(groups[~single].to_string(index=False, float_format='%.1f') if (~single).any() else 'no groups with a CI')
+    if single.any():
+        count = len(groups[single].drop_duplicates(['Model MLC'] + HARDWARE_KEYS))
+        print(f'{count} groups with a single delta have no CI and are not listed')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
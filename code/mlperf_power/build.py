@@ -0,0 +1,326 @@
+"""Parallel, incremental figure build.
+
+Runs the code/fig*.py scripts in one process pool sized to the machine. Each
+worker imports matplotlib, scienceplots, pandas and scipy once and then executes
+figure scripts in-process, so the import cost is paid per worker rather than per
+figure. Wall time, render time and peak RSS are reported for every figure.
+
+A manifest in figures/ records, for every figure, the hashes of its script, the
+shared mlperf_power code, the input files it read and the style settings. Figures
+whose fingerprints are unchanged and whose outputs still exist are skipped.
+``--profile`` picks the render profile (see render.py); changing it rebuilds
+every figure.
+
+Usage, from the repository root:
+
+    PYTHONPATH=code python -m mlperf_power.build [--only fig5a,fig10] [--jobs N] [--force]
+                                                 [--profile draft|publication|vector]
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import resource
+import runpy
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from importlib import metadata
+from pathlib import Path
+
+from . import loader, render
+from .loader import CODE_DIR, REPO_DIR, file_digest
+
+FIGURES_DIR = REPO_DIR / 'figures'
+MANIFEST_PATH = FIGURES_DIR / '.build-manifest.json'
+MANIFEST_VERSION = 1
+
+# Paths passed to savefig by the figure currently running in this worker
+_OUTPUTS = []
+
+
+def figure_name(script):
+    # 'fig5a_datacenter_trends.py' -> 'fig5a'
+    return script.stem.split('_')[0]
+
+
+def discover_figures():
+    return {figure_name(p): p for p in sorted(CODE_DIR.glob('fig*.py'))}
+
+
+def select_figures(figures, only):
+    if not only:
+        return figures
+    names = [n.strip() for n in only.split(',') if n.strip()]
+    unknown = [n for n in names if n not in figures]
+    if unknown:
+        raise SystemExit(f"Unknown figure(s): {', '.join(unknown)}. Available: {', '.join(figures)}")
+    return {n: figures[n] for n in names}
+
+
+class Fingerprints:
+    """Content hashes of the build inputs, memoized on (size, mtime) across runs."""
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+
+    def digest(self, path):
+        path = Path(path)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        key = _relative(path)
+        known = self.files.get(key)
+        if known and known['size'] == st.st_size and known['mtime_ns'] == st.st_mtime_ns:
+            return known['sha256']
+        sha = file_digest(path)
+        self.files[key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': sha}
+        return sha
+
+    def library(self):
+        # Any change to the shared package invalidates every figure
+        h = hashlib.sha256()
+        for path in sorted(Path(loader.__file__).parent.glob('*.py')):
+            h.update(path.name.encode())
+            h.update(self.digest(path).encode())
+        return h.hexdigest()
+
+
+def _relative(path):
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(REPO_DIR).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def _package_version(name):
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def style_fingerprint():
+    profile, profile_settings = render.active_profile()
+    settings = {
+        'matplotlib': _package_version('matplotlib'),
+        'scienceplots': _package_version('SciencePlots'),
+        'profile': profile,
+        'profile_settings': profile_settings,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'version': MANIFEST_VERSION, 'files': {}, 'figures': {}}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'version': MANIFEST_VERSION, 'files': {}, 'figures': {}}
+    return manifest
+
+
+def save_manifest(manifest):
+    FIGURES_DIR.mkdir(exist_ok=True)
+    tmp = MANIFEST_PATH.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def stale_reason(entry, script, fingerprints, library, style):
+    """Why a figure needs rebuilding, or None when it is up to date."""
+    if entry is None:
+        return 'never built'
+    if entry['script'] != fingerprints.digest(script):
+        return 'script changed'
+    if entry['library'] != library:
+        return 'shared code changed'
+    if entry['style'] != style:
+        return 'style settings changed'
+    for path, sha in entry['inputs'].items():
+        if fingerprints.digest(REPO_DIR / path) != sha:
+            return f'{path} changed'
+    for path in entry['outputs']:
+        if not (REPO_DIR / path).exists():
+            return f'{path} missing'
+    return None
+
+
+def _reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM (Linux >= 4.0) so each figure gets its own peak
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Fall back to the worker's lifetime high-water mark (kB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _track_savefig(savefig):
+    @functools.wraps(savefig)
+    def wrapper(self, fname, *args, **kwargs):
+        if isinstance(fname, (str, os.PathLike)):
+            _OUTPUTS.append(os.path.abspath(fname))
+        return savefig(self, fname, *args, **kwargs)
+    return wrapper
+
+
+def _init_worker():
+    # Pay the heavy imports once per worker, figure scripts then find them in sys.modules
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.figure
+    import matplotlib.pyplot  # noqa: F401
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import scienceplots  # noqa: F401
+    import scipy.stats  # noqa: F401
+
+    # Record what each figure writes so the manifest can check its outputs exist
+    matplotlib.figure.Figure.savefig = _track_savefig(matplotlib.figure.Figure.savefig)
+
+    # The scripts write to ./figures relative to the repository root
+    os.chdir(REPO_DIR)
+
+
+def run_figure(name, script):
+    """Execute one figure script in this worker and time it."""
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    loader.INPUTS_READ.clear()
+    render.RENDER_TIMES.clear()
+    _OUTPUTS.clear()
+    isolated = _reset_peak_rss()
+    start = time.perf_counter()
+    error = None
+    try:
+        # Styles set by one script must not leak into the next one run by this worker
+        with matplotlib.rc_context():
+            runpy.run_path(str(script), run_name='__main__')
+    except BaseException:
+        error = traceback.format_exc()
+    finally:
+        plt.close('all')
+    return {
+        'figure': name,
+        'seconds': time.perf_counter() - start,
+        'render_seconds': sum(r['seconds'] for r in render.RENDER_TIMES),
+        'profile': render.active_profile()[0],
+        'peak_rss_mb': _peak_rss_mb(),
+        'rss_isolated': isolated,
+        'error': error,
+        'inputs': sorted(_relative(p) for p in loader.INPUTS_READ),
+        'outputs': sorted({_relative(p) for p in _OUTPUTS}),
+    }
+
+
+def build(figures, jobs=None, force=False):
+    FIGURES_DIR.mkdir(exist_ok=True)
+    manifest = load_manifest()
+    fingerprints = Fingerprints(manifest['files'])
+    library = fingerprints.library()
+    style = style_fingerprint()
+
+    stale = {}
+    for name, script in figures.items():
+        reason = 'forced' if force else stale_reason(manifest['figures'].get(name), script,
+                                                      fingerprints, library, style)
+        if reason is None:
+            print(f'{name:<8} up to date', flush=True)
+        else:
+            print(f'{name:<8} rebuilding ({reason})', flush=True)
+            stale[name] = script
+
+    results = []
+    if stale:
+        jobs = max(1, min(jobs or os.cpu_count() or 1, len(stale)))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+            futures = [pool.submit(run_figure, name, script) for name, script in stale.items()]
+            for future in as_completed(futures):
+                result = future.result()
+                status = 'FAILED' if result['error'] else 'ok'
+                print(f"{result['figure']:<8} {status:<6} {result['seconds']:7.2f}s {result['peak_rss_mb']:8.1f} MB", flush=True)
+                if result['error']:
+                    print(result['error'], file=sys.stderr)
+                results.append(result)
+
+    for result in results:
+        name = result['figure']
+        if result['error']:
+            # A failed figure is always rebuilt next time
+            manifest['figures'].pop(name, None)
+            continue
+        manifest['figures'][name] = {
+            'script': fingerprints.digest(stale[name]),
+            'library': library,
+            'style': style,
+            'inputs': {path: fingerprints.digest(REPO_DIR / path) for path in result['inputs']},
+            'outputs': result['outputs'],
+            'render': {'profile': result['profile'], 'seconds': result['render_seconds']},
+        }
+    manifest['files'] = fingerprints.files
+    save_manifest(manifest)
+    return results
+
+
+def print_summary(results, wall):
+    if not results:
+        print(f'\nnothing to rebuild, total wall time {wall:.2f}s')
+        return
+    print(f"\n{'figure':<8} {'wall (s)':>9} {'render (s)':>11} {'peak RSS (MB)':>14}")
+    for r in sorted(results, key=lambda r: r['seconds'], reverse=True):
+        rss = f"{r['peak_rss_mb']:.1f}" + ('' if r['rss_isolated'] else '*')
+        print(f"{r['figure']:<8} {r['seconds']:>9.2f} {r['render_seconds']:>11.2f} {rss:>14}")
+    if not all(r['rss_isolated'] for r in results):
+        print('* worker high-water mark, could not be reset per figure on this platform')
+    print(f"render profile {results[0]['profile']}, total wall time {wall:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the paper figures in parallel.')
+    parser.add_argument('--only', help='comma-separated figures to build, e.g. fig5a,fig10')
+    parser.add_argument('--jobs', type=int, help='worker processes (default: number of cores)')
+    parser.add_argument('--force', action='store_true', help='rebuild figures even if they are up to date')
+    parser.add_argument('--profile', choices=sorted(render.PROFILES),
+                        help='render profile (default: $MLPERF_RENDER_PROFILE or publication)')
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        # Workers inherit the environment, so every figure renders with the same profile
+        os.environ['MLPERF_RENDER_PROFILE'] = args.profile
+    try:
+        render.active_profile()
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    figures = select_figures(discover_figures(), args.only)
+    start = time.perf_counter()
+    results = build(figures, args.jobs, args.force)
+    print_summary(results, time.perf_counter() - start)
+    return 1 if any(r['error'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,328 @@
+"""Concurrent power collection from many systems under test.
+
+The tutorial's client talks to one power server for one SUT. ``Collector``
+measures many SUTs at once from one asyncio event loop:
+
+    ConnectionPool   one connection per power server, opened at most
+                     ``MAX_CONNECTING`` at a time, reused by the runs of a server
+                     one after the other and reopened when it breaks
+    Collector.run    one run window of one SUT: wait for its begin, Go, stream the
+                     samples, Stop at its end
+    Collector._write parse the received lines (ptd.py) and append them to a trace
+                     (traces.py), one channel per run
+
+Runs hand their lines to the writer through a queue of at most ``QUEUE_BATCHES``
+batches. When the writer falls behind, runs wait on the queue and stop reading
+their sockets, so TCP flow control slows the servers down instead of memory
+growing. The writer parses and appends in a worker thread, so the event loop
+keeps reading the sockets meanwhile. Every run reports its samples, the samples
+its sampling interval implies over its run window (so lost samples, including
+those at the edges of the window, show as 'lost'), the receive latency and the
+time it was held back by the queue.
+
+Against simulated power servers (powerserver.py), without hardware:
+
+    PYTHONPATH=code python -m mlperf_power.collector --simulate 24 [--rate 100] [--seconds 10]
+                                                     [--loss 0.01] [--trace collected.ptrace]
+
+or against real ones, with a run window per SUT:
+
+    PYTHONPATH=code python -m mlperf_power.collector --sut node0=10.0.0.5:4950 --sut node1=10.0.0.6:4950
+                                                     --seconds 600 --rate 1 --mark testing
+"""
+
+import argparse
+import asyncio
+import math
+import sys
+import time
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pandas as pd
+
+from .powerserver import PowerServer, expected_samples
+from .ptd import parse_lines
+from .traces import TraceWriter
+
+# Batches of lines buffered between the runs and the trace writer
+QUEUE_BATCHES = 64
+
+# A run hands over its lines this often (s)
+FLUSH_INTERVAL = 0.1
+
+# Connections being opened at the same time, and attempts per connection
+MAX_CONNECTING = 16
+CONNECT_ATTEMPTS = 3
+
+# Receive latency histogram: range (s) and relative bin width
+LATENCY_RANGE = (1e-4, 1e3)
+LATENCY_RESOLUTION = 0.01
+
+STATS_COLUMNS = ['channel', 'sut', 'samples', 'expected', 'lost', 'loss_%', 'latency_p50_ms', 'latency_p99_ms',
+                 'latency_max_ms', 'stalled_s', 'reconnects']
+
+
+class RunStats:
+    """Sample, loss and latency counters of one run, in constant memory."""
+
+    _lo = math.log(LATENCY_RANGE[0])
+    _step = math.log1p(LATENCY_RESOLUTION)
+    _bins = int(math.ceil((math.log(LATENCY_RANGE[1]) - _lo) / _step)) + 1
+
+    def __init__(self, channel, sut, interval, begin, end):
+        self.channel = channel
+        self.sut = sut
+        self.interval = interval
+        # Window the run samples over: from its first Go (its begin until then) to its end
+        self.begin = begin
+        self.end = end
+        self.commanded = False
+        self.samples = 0
+        # Samples timed inside the window widened by half an interval on each side
+        # (sample times are rounded to ms), the ones 'expected' is counted against
+        self.in_window = 0
+        self.max_latency = 0.0
+        self.stalled = 0.0
+        self.reconnects = 0
+        self.histogram = np.zeros(self._bins, dtype=np.int64)
+
+    def add(self, times, arrived):
+        if not len(times):
+            return
+        self.samples += len(times)
+        slack = self.interval / 2
+        self.in_window += int(np.count_nonzero((times >= self.begin - slack) & (times <= self.end + slack)))
+        latency = arrived - times
+        self.max_latency = max(self.max_latency, float(latency.max()))
+        bins = np.floor((np.log(np.clip(latency, *LATENCY_RANGE)) - self._lo) / self._step).astype(np.int64)
+        self.histogram += np.bincount(np.clip(bins, 0, self._bins - 1), minlength=self._bins)
+
+    def latency(self, q):
+        if not self.samples:
+            return math.nan
+        i = int(np.searchsorted(np.cumsum(self.histogram), max(1, math.ceil(q / 100 * self.samples))))
+        return min(math.exp(self._lo + (i + 0.5) * self._step), self.max_latency)
+
+    def result(self):
+        expected = expected_samples(self.begin, self.end, 1 / self.interval)
+        lost = max(expected - self.in_window, 0)
+        return {
+            'channel': self.channel,
+            'sut': self.sut,
+            'samples': self.samples,
+            'expected': expected,
+            'lost': lost,
+            'loss_%': lost / expected * 100 if expected else math.nan,
+            'latency_p50_ms': self.latency(50) * 1e3,
+            'latency_p99_ms': self.latency(99) * 1e3,
+            'latency_max_ms': self.max_latency * 1e3 if self.samples else math.nan,
+            'stalled_s': self.stalled,
+            'reconnects': self.reconnects,
+        }
+
+
+class ConnectionPool:
+    """Connections to power servers, one per (host, port), used by one run at a time."""
+
+    def __init__(self, max_connecting=MAX_CONNECTING, attempts=CONNECT_ATTEMPTS):
+        self.connecting = asyncio.Semaphore(max_connecting)
+        self.attempts = attempts
+        self.locks = {}
+        self.idle = {}
+
+    async def _open(self, host, port):
+        async with self.connecting:
+            for attempt in range(self.attempts):
+                try:
+                    return await asyncio.open_connection(host, port)
+                except OSError:
+                    if attempt == self.attempts - 1:
+                        raise
+                    await asyncio.sleep(0.1 * 2 ** attempt)
+
+    @asynccontextmanager
+    async def connection(self, host, port):
+        """``(reader, writer)`` to ``host:port``, exclusive while the block runs.
+
+        The connection is kept for the next run of the server unless the block
+        raised, in which case it is closed.
+        """
+        key = (host, port)
+        async with self.locks.setdefault(key, asyncio.Lock()):
+            conn = self.idle.pop(key, None)
+            if conn is None or conn[1].is_closing():
+                conn = await self._open(host, port)
+            try:
+                yield conn
+            except BaseException:
+                conn[1].close()
+                raise
+            self.idle[key] = conn
+
+    async def close(self):
+        for reader, writer in self.idle.values():
+            writer.write(b'Quit\r\n')
+            writer.close()
+        for _, writer in self.idle.values():
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+        self.idle = {}
+
+
+class Collector:
+    """Collect the run windows of many SUTs into one trace at ``trace_path``."""
+
+    def __init__(self, trace_path, queue_batches=QUEUE_BATCHES, pool=None):
+        self.trace_path = trace_path
+        self.queue_batches = queue_batches
+        self.pool = pool
+        self.queue = None
+        self.stats = []
+
+    async def run(self, sut, host, port, begin, end, interval=1.0, mark='testing', channel=None):
+        """Collect ``sut`` from ``begin`` to ``end`` (epoch s) at one sample every ``interval`` s."""
+        stats = RunStats(channel or sut, sut, interval, begin, end)
+        self.stats.append(stats)
+        await asyncio.sleep(max(begin - time.time(), 0))
+        while time.time() < end:
+            try:
+                async with self.pool.connection(host, port) as (reader, writer):
+                    await self._session(reader, writer, stats, end, interval, mark)
+                return stats
+            except (OSError, asyncio.IncompleteReadError, ConnectionError):
+                stats.reconnects += 1
+                await asyncio.sleep(min(1.0, max(end - time.time(), 0)))
+        return stats
+
+    async def _session(self, reader, writer, stats, end, interval, mark):
+        if not stats.commanded:
+            stats.begin, stats.commanded = time.time(), True
+        writer.write(f'Go,{interval * 1000:g},0,{mark}\r\n'.encode())
+        await writer.drain()
+        stop = asyncio.get_running_loop().call_at(
+            asyncio.get_running_loop().time() + max(end - time.time(), 0), writer.write, b'Stop\r\n')
+        buffer, pending, flushed, done = b'', [], time.time(), False
+        try:
+            while not done:
+                data = await reader.read(1 << 16)
+                if not data:
+                    raise ConnectionError(f'{stats.sut}: power server closed the connection')
+                arrived = time.time()
+                *lines, buffer = (buffer + data).split(b'\r\n')
+                for line in lines:
+                    line = line.decode(errors='replace')
+                    if line.startswith('Time,'):
+                        pending.append(line)
+                    elif line.startswith('Error'):
+                        raise RuntimeError(f'{stats.sut}: {line}')
+                    elif line == 'Stop command succeeded':
+                        done = True
+                if pending and (done or arrived - flushed >= FLUSH_INTERVAL):
+                    waited = time.perf_counter()
+                    # Blocks while the queue is full: the backpressure on this connection
+                    await self.queue.put((stats, pending, arrived))
+                    stats.stalled += time.perf_counter() - waited
+                    pending, flushed = [], arrived
+        finally:
+            stop.cancel()
+
+    async def _write(self, writer):
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            stats, lines, arrived = item
+            # Parsed and written off the event loop, which keeps serving the connections
+            samples = await asyncio.to_thread(self._append, writer, stats.channel, lines)
+            stats.add(samples['time'].to_numpy(), arrived)
+
+    @staticmethod
+    def _append(writer, channel, lines):
+        samples = parse_lines(lines)
+        writer.append(channel, samples)
+        return samples
+
+    async def collect(self, windows):
+        """Collect every window concurrently and write the trace; returns one ``STATS_COLUMNS`` row per window.
+
+        ``windows`` are dicts of ``run``'s arguments (sut, host, port, begin,
+        end and optionally interval, mark, channel).
+        """
+        self.queue = asyncio.Queue(self.queue_batches)
+        self.pool = self.pool or ConnectionPool()
+        with TraceWriter(self.trace_path) as trace:
+            writer = asyncio.create_task(self._write(trace))
+            runs = asyncio.gather(*(self.run(**w) for w in windows))
+            try:
+                await asyncio.wait([runs, writer], return_when=asyncio.FIRST_COMPLETED)
+                if writer.done():
+                    # The writer only returns early when it failed: stop the runs and raise its error
+                    runs.cancel()
+                    await asyncio.gather(runs, return_exceptions=True)
+                    writer.result()
+                await runs
+            finally:
+                if not writer.done():
+                    await self.queue.put(None)
+                    await writer
+                await self.pool.close()
+        return pd.DataFrame([s.result() for s in self.stats], columns=STATS_COLUMNS)
+
+
+async def simulate(count, rate=100.0, seconds=10.0, loss=0.0, trace='collected.ptrace', stagger=0.0,
+                   profile='bursty'):
+    """Collect ``count`` simulated SUTs, each with its own mock power server in this process."""
+    servers = [await PowerServer(port=0, profile=profile, loss=loss, seed=i, base_W=300 + 50 * i).start()
+               for i in range(count)]
+    try:
+        start = time.time() + 0.2
+        windows = [{'sut': f'sut{i:02d}', 'host': '127.0.0.1', 'port': s.port, 'begin': start + i * stagger,
+                    'end': start + i * stagger + seconds, 'interval': 1 / rate} for i, s in enumerate(servers)]
+        return await Collector(trace).collect(windows)
+    finally:
+        for s in servers:
+            s.close()
+
+
+def _sut(text):
+    name, _, address = text.partition('=')
+    host, _, port = address.rpartition(':')
+    if not (name and host and port.isdigit()):
+        raise argparse.ArgumentTypeError(f"expected name=host:port, got '{text}'")
+    return name, host, int(port)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Collect power samples from many power servers at once.')
+    parser.add_argument('--sut', action='append', type=_sut, help='name=host:port of a power server (repeatable)')
+    parser.add_argument('--simulate', type=int, help='collect this many simulated SUTs instead')
+    parser.add_argument('--rate', type=float, default=1.0, help='samples per second per SUT (default: 1)')
+    parser.add_argument('--seconds', type=float, default=10.0, help='length of every run window (default: 10)')
+    parser.add_argument('--stagger', type=float, default=0.0, help='seconds between the starts of the windows')
+    parser.add_argument('--mark', default='testing', help='mark of the samples (default: testing)')
+    parser.add_argument('--loss', type=float, default=0.0, help='fraction of samples the simulated servers drop')
+    parser.add_argument('--trace', default='collected.ptrace', help='trace to write (default: collected.ptrace)')
+    args = parser.parse_args(argv)
+    if not args.sut and not args.simulate:
+        parser.error('give --sut or --simulate')
+
+    started = time.perf_counter()
+    if args.simulate:
+        stats = asyncio.run(simulate(args.simulate, args.rate, args.seconds, args.loss, args.trace, args.stagger))
+    else:
+        start = time.time() + 1
+        windows = [{'sut': name, 'host': host, 'port': port, 'begin': start + i * args.stagger,
+                    'end': start + i * args.stagger + args.seconds, 'interval': 1 / args.rate, 'mark': args.mark}
+                   for i, (name, host, port) in enumerate(args.sut)]
+        stats = asyncio.run(Collector(args.trace).collect(windows))
+    wall = time.perf_counter() - started
+    print(stats.to_string(index=False, float_format='%.2f'))
+    print(f"{int(stats['samples'].sum())} samples from {len(stats)} runs in {wall:.1f} s -> {args.trace}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Version-over-version efficiency deltas.
+
+``version_deltas`` pairs every submission with the submissions of the same model
+on the same hardware configuration in the next version and returns one row per
+pair, with both submission IDs, both values and the percent change. It replaces
+the per-organization / per-accelerator nested loops with one groupby to label the
+hardware configurations and one self-join on (configuration, version -> version + 1).
+``efficiency_deltas`` selects the samples/J deltas the way figure 10 does, so
+the bootstrap command line reports on the same deltas as the figure.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .join import efficiency_table
+
+# A hardware configuration: same organization, accelerator and accelerator count
+HARDWARE_KEYS = ['Organization', 'accelerator_model_name', 'Total Accelerators']
+
+# Model names unified before pairing, as in figure 10
+DELTA_MODEL_ALIASES = {'rnnt': 'rnn-t', 'bert': 'bert-99.9'}
+
+
+def version_step(versions, step='major'):
+    """Integer position of each version on the axis deltas are taken along.
+
+    ``'major'`` puts every round of a major version together ('v2.0' and 'v2.1'
+    are both 2), so deltas compare v2.x with v3.x. ``'round'`` numbers the rounds
+    in order so deltas compare consecutive rounds (v2.0 with v2.1).
+    """
+    versions = versions.astype('category')
+    codes = versions.cat.codes.to_numpy()
+    if step == 'major':
+        # Parsed on the few categories only, then broadcast to the rows by code
+        labels = pd.Series(versions.cat.categories.astype(str))
+        positions = pd.to_numeric(labels.str.extract(r'(\d+)', expand=False)).to_numpy(dtype=float)
+    elif step == 'round':
+        positions = np.arange(len(versions.cat.categories), dtype=float)
+    else:
+        raise ValueError(f"Unknown step '{step}', expected 'major' or 'round'")
+    return pd.Series(np.where(codes >= 0, positions[codes], np.nan), index=versions.index)
+
+
+def version_deltas(table, value='samples_per_J', by=HARDWARE_KEYS, model='Model MLC', step='major'):
+    """Percent change of ``value`` between consecutive versions of each model per configuration.
+
+    Rows with a missing configuration, model, version or value are ignored. The
+    result has the ``by`` and ``model`` columns, then 'version', 'Public ID' and
+    ``value`` suffixed with '_old' and '_new', and 'delta_pct'.
+    """
+    keys = list(by) + [model]
+    rows = table[keys + ['version', 'Public ID', value]].copy()
+    rows['step'] = version_step(rows['version'], step)
+    rows = rows.dropna(subset=keys + ['step', value])
+
+    # Label each (configuration, model) once so the self-join runs on two integer columns
+    rows['group'] = rows.groupby(keys, sort=False, observed=True).ngroup()
+    rows['next_step'] = rows['step'] + 1
+
+    old = rows[['group', 'next_step'] + keys + ['version', 'Public ID', value]]
+    new = rows[['group', 'step', 'version', 'Public ID', value]]
+    pairs = old.merge(new, left_on=['group', 'next_step'], right_on=['group', 'step'],
+                      suffixes=('_old', '_new'))
+
+    pairs['delta_pct'] = (pairs[f'{value}_new'] - pairs[f'{value}_old']) / pairs[f'{value}_old'] * 100
+    columns = keys + ['version_old', 'version_new', 'Public ID_old', 'Public ID_new',
+                      f'{value}_old', f'{value}_new', 'delta_pct']
+    return pairs[columns]
+
+
+def efficiency_deltas(division='datacenter', scenario='offline', step='major', min_delta=-50, versions=None,
+                      model_aliases=DELTA_MODEL_ALIASES):
+    """Samples/J ``version_deltas`` of ``division`` selected as in figure 10.
+
+    Rows of ``scenario`` only (None or '' for all); LLM results reported in
+    Tokens/s are left out and deltas below ``min_delta`` percent are dropped.
+    """
+    table = efficiency_table(division, model_aliases=model_aliases, versions=versions)
+    keep = np.ones(len(table), dtype=bool)
+    if scenario and 'Scenario' in table.columns:
+        keep &= (table['Scenario'].str.lower() == scenario.lower()).to_numpy()
+    if 'Units_perf' in table.columns:
+        keep &= (table['Units_perf'] != 'Tokens/s').to_numpy()
+    deltas = version_deltas(table[keep].copy(), value='samples_per_J', step=step)
+    return deltas[deltas['delta_pct'] >= min_delta]
@@ -0,0 +1,71 @@
+"""Per-accelerator and per-node efficiency metrics.
+
+Raw totals compare a 64-node training cluster with a one-box edge system.
+``add_derived_metrics`` adds system-size normalized columns to a paired
+efficiency table; the join applies it, so they are part of the cached table:
+
+    nodes                          number of nodes
+    accelerators                   total accelerators (missing for CPU-only systems)
+    samples_per_s                  throughput, samples/s (throughput pairs only)
+    samples_per_s_per_accelerator
+    samples_per_s_per_node
+    power_W_per_accelerator        average system power over the accelerators
+    power_W_per_node
+    J_per_sample                   energy per sample (throughput and latency pairs)
+    energy_J_per_accelerator       energy per sample, or per run for time-to-train
+    tokens_per_s                   output tokens/s of LLM benchmarks (see workloads.py)
+    tokens_per_J
+
+samples/J is already in the table. Inference and training files spell the
+system-size columns differently; the first one present is used.
+"""
+
+import numpy as np
+
+# Derived column -> source columns, the first one present is used
+SIZE_COLUMNS = {
+    'nodes': ['number_of_nodes', 'Number Of Nodes'],
+    'accelerators': ['Total Accelerators'],
+}
+
+DERIVED_COLUMNS = [
+    'nodes', 'accelerators', 'samples_per_s', 'samples_per_s_per_accelerator', 'samples_per_s_per_node',
+    'power_W_per_accelerator', 'power_W_per_node', 'J_per_sample', 'energy_J_per_accelerator',
+    'tokens_per_s', 'tokens_per_J',
+]
+
+
+def _size(table, sources):
+    col = next((c for c in sources if c in table.columns), None)
+    if col is None:
+        return np.full(len(table), np.nan)
+    values = table[col].to_numpy(dtype=float)
+    # A zero count (CPU-only systems list 0 accelerators) does not normalize anything
+    return np.where(values > 0, values, np.nan)
+
+
+def add_derived_metrics(table):
+    """``table`` with the ``DERIVED_COLUMNS`` added (see the module docstring)."""
+    table = table.copy()
+    nodes = _size(table, SIZE_COLUMNS['nodes'])
+    accelerators = _size(table, SIZE_COLUMNS['accelerators'])
+    kind = table['kind'].astype(str).to_numpy()
+    performance = table['performance'].to_numpy(dtype=float)
+    power = table['power_W'].to_numpy(dtype=float)
+    energy = table['energy_J'].to_numpy(dtype=float)
+
+    samples_per_s = np.where(kind == 'throughput', performance, np.nan)
+    table['nodes'] = nodes
+    table['accelerators'] = accelerators
+    table['samples_per_s'] = samples_per_s
+    table['samples_per_s_per_accelerator'] = samples_per_s / accelerators
+    table['samples_per_s_per_node'] = samples_per_s / nodes
+    table['power_W_per_accelerator'] = power / accelerators
+    table['power_W_per_node'] = power / nodes
+    table['J_per_sample'] = np.where(kind == 'time_to_train', np.nan, energy)
+    table['energy_J_per_accelerator'] = energy / accelerators
+    tokens = table['tokens_per_sample'].to_numpy(dtype=float) if 'tokens_per_sample' in table.columns else \
+        np.full(len(table), np.nan)
+    table['tokens_per_s'] = samples_per_s * tokens
+    table['tokens_per_J'] = table['samples_per_J'].to_numpy(dtype=float) * tokens
+    return table
@@ -0,0 +1,240 @@
+"""Streaming ingestion of raw MLCommons result exports.
+
+Builds the data_cleaned_{division}.csv files from raw exports (such as
+raw_data.csv) in a single pass with bounded memory. The export is read in
+chunks and every chunk goes through a chain of generators:
+
+    read_chunks        fixed-size chunks of raw text, nothing is parsed
+    whole_submissions  re-cut the chunks at Public ID boundaries
+    route              split each chunk by division
+    power_only         drop submissions without a power or energy result
+
+and the surviving rows are projected onto the division's columns and appended
+to its output. Memory is bounded by the chunk size plus the largest single
+submission, as long as the rows of a submission are contiguous in the export
+(the website exports are sorted by Public ID).
+
+Usage, from the repository root:
+
+    PYTHONPATH=code python -m mlperf_power.ingest raw_data.csv [more exports ...]
+                                                  [--output-dir code] [--chunksize 100000]
+"""
+
+import argparse
+import os
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .loader import CODE_DIR, DIVISIONS
+from .units import UNITS
+
+# Columns of the cleaned inference and tiny files
+INFERENCE_COLUMNS = [
+    'Public ID', 'Organization', 'SystemType', 'SystemName', 'Model', 'Model MLC', 'Scenario',
+    'Result', 'number_of_nodes', 'host_processor_model_name', 'host_processors_per_node',
+    'accelerator_model_name', 'accelerators_per_node', 'Software', 'operating_system', 'notes',
+    'version', 'date', 'vdate', 'Units', 'Total Accelerators',
+]
+
+# Columns of the cleaned training file. The website export repeats some names;
+# pandas reads the repeats as 'Units.1', 'Units.2', ... and they are written back
+# under their original names.
+TRAINING_COLUMNS = [
+    'Public ID', 'Availability', 'Organization', 'System Name', 'Accelerator Model Name',
+    'Accelerators Per Node', 'Host Processor Model Name', 'Host Processors Per Node', 'Benchmark',
+    'Model MLC', 'Units (copy)', 'Units', 'Accelerator Model Name.1', 'Accelerators Per Node.1',
+    'Accuracy', 'Availability.1', 'Host Processor Core Count', 'Host Processor Model Name.1',
+    'Number Of Nodes', 'Units.1', 'Avg. Result at System Name', 'Total Accelerators',
+]
+
+# Division -> (output columns, keep only submissions with a power or energy result).
+# The cleaned tiny data also keeps the latency-only submissions.
+SPECS = {
+    'datacenter': (INFERENCE_COLUMNS, True),
+    'edge': (INFERENCE_COLUMNS, True),
+    'tiny': (INFERENCE_COLUMNS, False),
+    'training': (TRAINING_COLUMNS, True),
+}
+
+# Raw 'Units' values that carry a power or energy measurement
+POWER_UNITS = sorted(u for u, (quantity, _) in UNITS.items()
+                     if quantity in ('power_W', 'energy_J_per_sample', 'energy_J'))
+
+_MANGLED = re.compile(r'\.\d+$')
+
+
+def read_chunks(path, chunksize):
+    """Chunks of a raw export, every cell kept as the text it was exported as."""
+    with pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize) as reader:
+        yield from reader
+
+
+def whole_submissions(chunks):
+    """Re-cut ``chunks`` so that no Public ID is split across two of them.
+
+    The rows of the last Public ID of a chunk are held back and prepended to the
+    next chunk.
+    """
+    carry = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        ids = chunk['Public ID'].to_numpy()
+        # Start of the trailing run of rows with the last Public ID
+        breaks = np.flatnonzero(ids[1:] != ids[:-1])
+        tail = breaks[-1] + 1 if len(breaks) else 0
+        carry = chunk.iloc[tail:]
+        if tail:
+            yield chunk.iloc[:tail]
+    if carry is not None and len(carry):
+        yield carry
+
+
+def division_labels(chunk):
+    """Division of every row of a raw chunk, as a frame of booleans (one column per division).
+
+    Tiny and inference rows are told apart by 'vdate' ('Tiny v1.2', 'Inference v4.0'),
+    inference rows are split by 'SystemType' (a 'datacenter,edge' system goes to
+    both), training rows have Benchmark 'Training'. Rows matching nothing are
+    not routed anywhere.
+    """
+    def column(name):
+        if name in chunk.columns:
+            return chunk[name].str.strip().str.lower()
+        return pd.Series('', index=chunk.index)
+
+    vdate, system_type, benchmark = column('vdate'), column('SystemType'), column('Benchmark')
+    tiny = vdate.str.startswith('tiny')
+    training = (benchmark == 'training') | vdate.str.startswith('training')
+    inference = ~tiny & ~training & (vdate.str.startswith('inference') | (vdate == ''))
+    return pd.DataFrame({
+        'datacenter': inference & system_type.str.contains('datacenter', regex=False),
+        'edge': inference & system_type.str.contains('edge', regex=False),
+        'tiny': tiny,
+        'training': training,
+    })
+
+
+def route(chunks):
+    """Yield ``(division, rows)`` for every division present in each chunk."""
+    for chunk in chunks:
+        labels = division_labels(chunk)
+        for division in SPECS:
+            mask = labels[division].to_numpy()
+            if mask.any():
+                yield division, chunk[mask]
+        unrouted = ~labels.to_numpy().any(axis=1)
+        if unrouted.any():
+            yield None, chunk[unrouted]
+
+
+def power_only(routed):
+    """Drop the rows of submissions that have no power or energy result."""
+    for division, rows in routed:
+        if division is not None and SPECS[division][1]:
+            measured = rows['Units'].isin(POWER_UNITS) if 'Units' in rows.columns else \
+                pd.Series(False, index=rows.index)
+            keep = measured.groupby(rows['Public ID'], sort=False).transform('any')
+            if (~keep).any():
+                yield 'unmeasured', rows[~keep.to_numpy()]
+            rows = rows[keep.to_numpy()]
+        yield division, rows
+
+
+def project(rows, columns):
+    """``rows`` restricted to ``columns`` in order; columns missing from the export are left empty."""
+    return rows.reindex(columns=columns, fill_value='')
+
+
+class _Outputs:
+    """One CSV per division, written to a temporary file and moved into place on commit."""
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self.files = {}
+
+    def append(self, division, rows):
+        if division not in self.files:
+            path = self.output_dir / DIVISIONS[division]
+            tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+            f = open(tmp, 'w', newline='', encoding='utf-8')
+            columns = SPECS[division][0]
+            f.write(','.join(_csv_field(_MANGLED.sub('', c)) for c in columns) + '\n')
+            self.files[division] = (f, tmp, path)
+        f, _, _ = self.files[division]
+        project(rows, SPECS[division][0]).to_csv(f, header=False, index=False)
+
+    def commit(self):
+        for f, tmp, path in self.files.values():
+            f.close()
+            os.replace(tmp, path)
+        return [path for _, _, path in self.files.values()]
+
+    def abort(self):
+        for f, tmp, _ in self.files.values():
+            f.close()
+            tmp.unlink(missing_ok=True)
+
+
+def _csv_field(text):
+    return f'"{text}"' if any(c in text for c in ',"\n') else text
+
+
+def ingest(paths, output_dir=CODE_DIR, chunksize=100_000):
+    """Stream the raw exports in ``paths`` into the cleaned CSVs in ``output_dir``.
+
+    Returns the number of rows written per division that was written, plus
+    'read', 'unmeasured' (dropped for lack of a power result) and 'unrouted'
+    counts. Outputs are only
+    replaced once every input has been read, so a failed run leaves them intact.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    counts = dict.fromkeys(['read', *SPECS, 'unmeasured', 'unrouted'], 0)
+    outputs = _Outputs(output_dir)
+    try:
+        for path in paths:
+            chunks = whole_submissions(read_chunks(path, chunksize))
+            for division, rows in power_only(route(_counted(chunks, counts))):
+                if division in SPECS:
+                    outputs.append(division, rows)
+                    counts[division] += len(rows)
+                else:
+                    counts[division or 'unrouted'] += len(rows)
+    except BaseException:
+        outputs.abort()
+        raise
+    outputs.commit()
+    # Divisions without rows keep their previous CSV, if any
+    return {key: n for key, n in counts.items() if key not in SPECS or key in outputs.files}
+
+
+def _counted(chunks, counts):
+    for chunk in chunks:
+        counts['read'] += len(chunk)
+        yield chunk
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the cleaned division CSVs from raw result exports.')
+    parser.add_argument('paths', nargs='+', type=Path, help='raw export CSV files')
+    parser.add_argument('--output-dir', type=Path, default=CODE_DIR,
+                        help='directory for the data_cleaned_*.csv files (default: code/)')
+    parser.add_argument('--chunksize', type=int, default=100_000, help='rows read at a time')
+    args = parser.parse_args(argv)
+
+    counts = ingest(args.paths, args.output_dir, args.chunksize)
+    print(f"read {counts['read']} rows")
+    for division in (d for d in SPECS if d in counts):
+        print(f'{division:<12} {counts[division]:>9} rows -> {args.output_dir / DIVISIONS[division]}')
+    print(f"{'unmeasured':<12} {counts['unmeasured']:>9} rows without a power result dropped")
+    print(f"{'unrouted':<12} {counts['unrouted']:>9} rows matching no division dropped")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Canonical performance/power join.
+
+Each cleaned CSV stores a submission's performance and its power (or energy)
+as separate rows told apart by 'Units'. ``efficiency_table`` pairs them once per
+division, by the canonical quantity the unit registry assigns to every row, into
+a tidy table with the system metadata, the raw results and derived values:
+
+    performance   samples/s for throughput pairs, s for latency and time-to-train pairs
+    power_W       average system power
+    energy_J      energy per sample (per run for time-to-train pairs)
+    samples_per_J energy efficiency
+
+plus the per-accelerator and per-node columns of ``derived.DERIVED_COLUMNS``.
+
+Rows are paired through a key index (hash-factorized keys plus a counting sort),
+which is linear in the number of rows and output pairs. Submissions never span
+versions, so the table is joined and cached per partition of the store: every
+figure reads the same pre-joined data and a new round only joins its own rows.
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from .derived import add_derived_metrics
+from .loader import CACHE_VERSION, RESULT_COLUMNS, apply_model_aliases, cached_path, cached_table, timed_load
+from .store import concat_partitions, partitions, read_partition
+
+# Bump whenever the pairing or derived columns change so stale caches are not reused
+JOIN_VERSION = 5
+
+# Rows of one submission are paired on these columns (training has no
+# Scenario, version or date columns and pairs on the first two only)
+KEYS = ['Public ID', 'Model MLC', 'Scenario', 'version', 'date']
+
+# (kind, performance quantity, power or energy quantity), see units.QUANTITIES
+PAIRINGS = [
+    ('throughput', 'throughput_samples_s', 'power_W'),
+    ('latency', 'latency_s', 'energy_J_per_sample'),
+    ('time_to_train', 'latency_s', 'energy_J'),
+]
+
+
+def pair_index(left, right, keys):
+    """Positions (i, j) of every left/right row pair with equal ``keys``.
+
+    Matches ``pd.merge(how='inner')``: missing key values match each other and
+    pairs come out in left order, then right order within a key.
+    """
+    both = pd.concat([left[keys], right[keys]], ignore_index=True)
+    codes = both.groupby(keys, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    left_codes, right_codes = codes[:len(left)], codes[len(left):]
+
+    # Counting sort of the right side by key: rows of key k sit in order[starts[k]:starts[k + 1]]
+    counts = np.bincount(right_codes, minlength=codes.max(initial=-1) + 1)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    order = np.argsort(right_codes, kind='stable')
+
+    matches = counts[left_codes]
+    left_pos = np.repeat(np.arange(len(left)), matches)
+    first = np.repeat(np.cumsum(matches) - matches, matches)
+    offset = np.arange(len(left_pos)) - first
+    right_pos = order[np.repeat(starts[left_codes], matches) + offset]
+    return left_pos, right_pos
+
+
+def _pair(df, kind, perf_quantity, power_quantity):
+    keys = [k for k in KEYS if k in df.columns]
+    result = next(col for col in RESULT_COLUMNS if col in df.columns)
+    perf = df[(df['Quantity'] == perf_quantity) & df['Value'].notna()].reset_index(drop=True)
+    power = df[(df['Quantity'] == power_quantity) & df['Value'].notna()].reset_index(drop=True)
+    i, j = pair_index(perf, power, keys)
+
+    meta = [c for c in perf.columns if c not in (result, f'{result} Flag', 'Units', 'Quantity', 'Value')]
+    out = perf[meta].take(i).reset_index(drop=True)
+    out['kind'] = kind
+    out['Units_perf'] = perf['Units'].take(i).to_numpy()
+    out['Units_power'] = power['Units'].take(j).to_numpy()
+    out['Result_perf'] = perf[result].take(i).to_numpy()
+    out['Result_power'] = power[result].take(j).to_numpy()
+
+    perf_value = perf['Value'].take(i).to_numpy()
+    power_value = power['Value'].take(j).to_numpy()
+    out['performance'] = perf_value
+    if kind == 'throughput':
+        out['power_W'] = power_value
+        out['energy_J'] = power_value / perf_value
+        out['samples_per_J'] = perf_value / power_value
+    else:
+        # Latency pairs report energy per sample (or per run), power is energy over time
+        out['power_W'] = power_value / perf_value
+        out['energy_J'] = power_value
+        out['samples_per_J'] = 1 / power_value if kind == 'latency' else np.nan
+    return out
+
+
+def build_efficiency_table(df):
+    table = pd.concat([_pair(df, *pairing) for pairing in PAIRINGS], ignore_index=True)
+    for col in ('kind', 'Units_perf', 'Units_power'):
+        table[col] = table[col].astype('category')
+    return add_derived_metrics(table)
+
+
+def efficiency_cache(division, version, entry):
+    """``cached_table``/``cached_path`` arguments of the joined table of one partition."""
+    return (f'{division}-efficiency-{version}', JOIN_VERSION, entry['digest'],
+            lambda: build_efficiency_table(read_partition(division, entry)))
+
+
+def efficiency_digest(entry):
+    """Digest to cache tables derived from the joined table of a partition under.
+
+    It changes with the partition and with the versions of the parsing and
+    pairing code, so derived tables are rebuilt whenever the joined table is.
+    """
+    key = f"{entry['digest']}-{CACHE_VERSION}-{JOIN_VERSION}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def efficiency_partition_path(division, version, entry):
+    return cached_path(*efficiency_cache(division, version, entry))
+
+
+@timed_load
+def efficiency_table(division, model_aliases=None, kind=None, versions=None):
+    """Paired performance/power rows of ``division``, see the module docstring.
+
+    ``model_aliases`` renames 'Model MLC' values as in ``load_division``;
+    ``kind`` keeps only 'throughput', 'latency' or 'time_to_train' pairs and
+    ``versions`` only reads the partitions of those versions.
+    """
+    frames = [cached_table(*efficiency_cache(division, version, entry))
+              for version, entry in partitions(division, versions)]
+    if not frames:
+        raise ValueError(f"No partitions of '{division}' for versions {sorted(versions)}")
+    table = concat_partitions(frames)
+    # Pairs of all partitions grouped by kind, in PAIRINGS order, as if joined in one go
+    rank = {kind: i for i, (kind, _, _) in enumerate(PAIRINGS)}
+    order = np.argsort(table['kind'].map(rank).to_numpy(dtype=int), kind='stable')
+    table = table.take(order).reset_index(drop=True)
+    if kind is not None:
+        table = table[table['kind'] == kind].reset_index(drop=True)
+    return apply_model_aliases(table, model_aliases)
@@ -0,0 +1,135 @@
+"""Materialized efficiency leaderboards.
+
+The trend figures want the best samples/J per (model, version), the power-scale
+figure wants the min and max power per division. Instead of grouping the whole
+paired table in every script, the records are materialized once per partition
+of the store (one version of one division), at the grain of
+
+    Model MLC, Scenario, version, date, kind     (the columns the division has)
+
+``leaderboard`` has one row per group with the submission count, the best
+samples/J, the min / max / median power and the Public ID holding each record.
+``top_k`` has the k most efficient submissions of every group. Both are cached
+per partition, keyed on the joined table they are built from, so appending a
+round to the store only computes the new round's records; everything else is a
+lookup.
+
+    PYTHONPATH=code python -m mlperf_power.leaderboard --division datacenter --model llama2
+
+refreshes the materialized tables and prints the records.
+"""
+
+import argparse
+import sys
+
+import pandas as pd
+
+from .join import efficiency_cache, efficiency_digest
+from .loader import DIVISIONS, apply_model_aliases, cached_table, timed_load
+from .store import concat_partitions, partitions
+
+# Bump whenever the materialized columns change so stale tables are not reused
+LEADERBOARD_VERSION = 1
+
+# Group columns, those missing from a division are left out (training has no Scenario)
+GROUP_KEYS = ['Model MLC', 'Scenario', 'version', 'date', 'kind']
+
+# System columns kept with every top-k entry
+ENTRY_COLUMNS = ['Public ID', 'Organization', 'accelerator_model_name', 'Total Accelerators',
+                 'performance', 'power_W', 'samples_per_J']
+
+TOP_K = 10
+
+
+def _group_keys(table):
+    return [k for k in GROUP_KEYS if k in table.columns]
+
+
+def _record(table, groups, value, how):
+    """Value and Public ID of the min or max ``value`` of every group (missing values skipped)."""
+    rows = table.dropna(subset=[value])
+    grouped = rows.groupby(groups.loc[rows.index], sort=False)[value]
+    picked = grouped.idxmax() if how == 'max' else grouped.idxmin()
+    return (pd.Series(rows.loc[picked.to_numpy(), value].to_numpy(), index=picked.index),
+            pd.Series(rows.loc[picked.to_numpy(), 'Public ID'].to_numpy(), index=picked.index))
+
+
+def build_leaderboard(table):
+    """Records of every group of a paired efficiency table, see the module docstring."""
+    keys = _group_keys(table)
+    # One integer label per group so the records below align on a plain index
+    groups = table.groupby(keys, sort=True, dropna=False, observed=True).ngroup()
+    board = table.loc[~groups.duplicated().to_numpy(), keys].set_index(groups.drop_duplicates().to_numpy())
+    board = board.sort_index()
+
+    board['count'] = groups.value_counts().sort_index()
+    board['best_samples_per_J'], board['best_id'] = _record(table, groups, 'samples_per_J', 'max')
+    board['min_power_W'], board['min_power_id'] = _record(table, groups, 'power_W', 'min')
+    board['max_power_W'], board['max_power_id'] = _record(table, groups, 'power_W', 'max')
+    board['median_power_W'] = table['power_W'].groupby(groups, sort=True).median()
+    for col in ('best_id', 'min_power_id', 'max_power_id'):
+        board[col] = board[col].astype(object)
+    return board.reset_index(drop=True)
+
+
+def build_top_k(table, k=TOP_K):
+    """The ``k`` highest samples/J entries of every group, ranked from 1."""
+    keys = _group_keys(table)
+    columns = [c for c in ENTRY_COLUMNS if c in table.columns]
+    rows = table.dropna(subset=['samples_per_J'])
+    order = rows.sort_values('samples_per_J', ascending=False, kind='stable')
+    rank = order.groupby(keys, sort=False, dropna=False, observed=True).cumcount() + 1
+    top = order[(rank <= k).to_numpy()].assign(rank=rank[rank <= k].to_numpy())
+    top = top.sort_values(keys + ['rank'], kind='stable')
+    return top[keys + ['rank'] + columns].reset_index(drop=True)
+
+
+def _materialized(division, versions, name, build):
+    frames = []
+    for version, entry in partitions(division, versions):
+        joined = efficiency_cache(division, version, entry)
+        frames.append(cached_table(f'{division}-{name}-{version}', LEADERBOARD_VERSION, efficiency_digest(entry),
+                                   lambda joined=joined: build(cached_table(*joined))))
+    if not frames:
+        raise ValueError(f"No partitions of '{division}' for versions {sorted(versions)}")
+    return concat_partitions(frames)
+
+
+@timed_load
+def leaderboard(division, model_aliases=None, versions=None):
+    """One row of records per group of ``division`` (see the module docstring).
+
+    ``model_aliases`` renames 'Model MLC' values as in ``load_division``; groups
+    that an alias merges keep separate rows.
+    """
+    board = _materialized(division, versions, 'leaderboard', build_leaderboard)
+    return apply_model_aliases(board, model_aliases)
+
+
+@timed_load
+def top_k(division, k=TOP_K, model_aliases=None, versions=None):
+    """The ``k`` most efficient submissions of every group of ``division``."""
+    table = _materialized(division, versions, f'top{k}', lambda t: build_top_k(t, k))
+    return apply_model_aliases(table, model_aliases)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Refresh and print the efficiency leaderboards.')
+    parser.add_argument('--division', action='append', choices=sorted(DIVISIONS),
+                        help='division (repeatable, default: all)')
+    parser.add_argument('--model', help="only models containing this text, e.g. 'llama2'")
+    parser.add_argument('--top', type=int, help='print the top-k entries of every group instead of the records')
+    args = parser.parse_args(argv)
+
+    for division in args.division or DIVISIONS:
+        table = top_k(division, args.top) if args.top else leaderboard(division)
+        if args.model:
+            mask = table['Model MLC'].astype(str).str.contains(args.model, case=False, regex=False)
+            table = table[mask.to_numpy()]
+        print(f'== {division} ({len(table)} rows)')
+        print(table.to_string(index=False) if len(table) else 'no matching rows')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
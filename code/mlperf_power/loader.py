@@ -0,0 +1,254 @@
+"""Shared loader for the cleaned MLPerf Power CSVs.
+
+Every figure used to call ``pd.read_csv`` on the same ``data_cleaned_*.csv``
+files and repeat the same cleanup. ``load_division`` parses each CSV once into
+typed columns (categorical system metadata, numeric results, parsed dates) and
+stores the result in the partitioned store (see store.py), one memory-mapped
+Feather file per version, refreshed when the CSV's content hash changes.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .numeric import parse_numbers
+from .units import QUANTITIES, UNITS, normalize_units, unknown_units
+from .workloads import TOKEN_UNITS, TOKENS_PER_SAMPLE, mislabeled_tokens, normalize_tokens
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # the cache is an optimization, plain CSV parsing still works
+    pa = None
+    feather = None
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+REPO_DIR = CODE_DIR.parent
+CACHE_DIR = Path(os.environ.get('MLPERF_CACHE_DIR', REPO_DIR / '.cache'))
+
+# Division name -> cleaned CSV shipped in /code
+DIVISIONS = {
+    'datacenter': 'data_cleaned_inference_datacenter.csv',
+    'edge': 'data_cleaned_inference_edge.csv',
+    'tiny': 'data_cleaned_tiny.csv',
+    'training': 'data_cleaned_training.csv',
+}
+
+# Low-cardinality columns that are stored as categoricals
+CATEGORICAL_COLUMNS = ['Organization', 'Model MLC', 'Scenario', 'Units', 'version']
+
+# Columns holding measured values as text (with thousands separators)
+RESULT_COLUMNS = ['Result', 'Avg. Result at System Name']
+
+# Bump whenever the parsing below changes so stale cache files are not reused
+CACHE_VERSION = 5
+
+# Tables applied while parsing, by name; parse_fingerprint covers their contents
+# so editing one re-parses the stored data without a CACHE_VERSION bump
+PARSE_TABLES = {
+    'QUANTITIES': QUANTITIES,
+    'UNITS': UNITS,
+    'TOKENS_PER_SAMPLE': TOKENS_PER_SAMPLE,
+    'TOKEN_UNITS': TOKEN_UNITS,
+}
+
+# Input files read by this process; the incremental build records these as
+# the dependencies of the figure that was running
+INPUTS_READ = set()
+
+# One entry per outermost load call: function, start (perf_counter) and seconds
+LOAD_TIMES = []
+
+_DIGESTS = {}
+_load_depth = 0
+
+
+def timed_load(func):
+    """Record the time spent in ``func`` in ``LOAD_TIMES`` (nested loads count once)."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        global _load_depth
+        start = time.perf_counter()
+        _load_depth += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _load_depth -= 1
+            if _load_depth == 0:
+                LOAD_TIMES.append({'call': func.__name__, 'start': start,
+                                   'seconds': time.perf_counter() - start})
+    return wrapper
+
+
+def parse_fingerprint():
+    """``CACHE_VERSION`` and a hash of ``PARSE_TABLES``: what the parsed rows depend on besides the CSV."""
+    tables = json.dumps(PARSE_TABLES, sort_keys=True, default=repr).encode()
+    return f'{CACHE_VERSION}-{hashlib.sha256(tables).hexdigest()[:16]}'
+
+
+def division_path(division):
+    if division not in DIVISIONS:
+        raise ValueError(f"Unknown division '{division}', expected one of {sorted(DIVISIONS)}")
+    return CODE_DIR / DIVISIONS[division]
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def version_key(version):
+    # 'v4.1' -> (4, 1) so categories sort numerically rather than lexically
+    parts = str(version).lstrip('v').split('.')
+    return tuple(int(p) if p.isdigit() else 0 for p in parts)
+
+
+def remap_categories(values, mapper):
+    """Apply ``mapper`` to the categories of ``values`` and merge any duplicates.
+
+    Only the (few) category labels are touched, the per-row codes are remapped
+    with a single take, so this stays cheap on very large tables.
+    """
+    values = values.astype('category')
+    renamed = [mapper(c) for c in values.cat.categories]
+    codes, uniques = pd.factorize(pd.Index(renamed, dtype=object), sort=True)
+    old_codes = values.cat.codes.to_numpy()
+    new_codes = np.where(old_codes >= 0, codes[old_codes], -1)
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories=uniques),
+                     index=values.index, name=values.name)
+
+
+def apply_model_aliases(df, model_aliases):
+    """Rename 'Model MLC' values (lower-case name -> name), e.g. ``{'rnnt': 'rnn-t'}``."""
+    if model_aliases and 'Model MLC' in df.columns:
+        df['Model MLC'] = remap_categories(df['Model MLC'], lambda m: model_aliases.get(m, m))
+    return df
+
+
+def parse_division(path):
+    """Parse one cleaned CSV into typed columns.
+
+    All-numeric columns are parsed by the CSV reader (``thousands=','``); result
+    columns that mix in links or placeholder text go through ``parse_numbers``
+    and get a '<column> Flag' categorical marking the cells that are not numbers.
+    """
+    df = pd.read_csv(path, thousands=',', low_memory=False)
+
+    for col in RESULT_COLUMNS:
+        if col in df.columns:
+            df[col], df[f'{col} Flag'] = parse_numbers(df[col])
+
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'], format='%m/%d/%Y')
+
+    for col in CATEGORICAL_COLUMNS:
+        if col not in df.columns:
+            continue
+        if col == 'version':
+            categories = sorted(df[col].dropna().unique(), key=version_key)
+            df[col] = pd.Categorical(df[col], categories=categories, ordered=True)
+        else:
+            df[col] = df[col].astype('category')
+
+    # Model names are spelled inconsistently across versions ('ResNet' vs 'resnet')
+    if 'Model MLC' in df.columns:
+        df['Model MLC'] = remap_categories(df['Model MLC'], str.lower)
+
+    # Canonical quantity and value for every raw unit spelling, token rates in samples/s
+    result = next(col for col in RESULT_COLUMNS if col in df.columns)
+    return normalize_tokens(normalize_units(df, result))
+
+
+def _write_cache(df, path, stale_pattern):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # Write to a private file first so concurrent readers never see a partial cache
+    tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+    feather.write_feather(df, tmp, compression='uncompressed')
+    os.replace(tmp, path)
+    for stale in CACHE_DIR.glob(stale_pattern):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+
+
+def cached_path(name, version, digest, build):
+    """Path of the Feather file caching ``build()``, written first if missing.
+
+    The cache file is keyed on ``name``, the ``version`` of the code that builds
+    the table and the ``digest`` of its inputs; older files for ``name`` are
+    removed when a new one is written.
+    """
+    path = CACHE_DIR / f'{name}-v{version}-{digest[:16]}.feather'
+    if not path.exists():
+        _write_cache(build(), path, f'{name}-v*-*.feather')
+    return path
+
+
+def cached_table(name, version, digest, build, columns=None):
+    """Return ``build()``, cached as an uncompressed Feather file (see ``cached_path``).
+
+    Reads memory-map the file.
+    """
+    if feather is None:
+        df = build()
+        return df if columns is None else df[columns].copy()
+    path = cached_path(name, version, digest, build)
+    return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
+def division_digest(division):
+    """Content hash of a division's CSV, memoized on (size, mtime) within the process."""
+    path = division_path(division)
+    INPUTS_READ.add(path)
+    st = path.stat()
+    key = (path, st.st_size, st.st_mtime_ns)
+    if key not in _DIGESTS:
+        _DIGESTS[key] = file_digest(path)
+    return _DIGESTS[key]
+
+
+@timed_load
+def read_csv(filename, **kwargs):
+    """``pd.read_csv`` for a file in /code that is not a cleaned division CSV."""
+    path = CODE_DIR / filename
+    INPUTS_READ.add(path)
+    return pd.read_csv(path, **kwargs)
+
+
+@timed_load
+def load_division(division, model_aliases=None, columns=None, versions=None):
+    """Load the cleaned data for ``division`` ('datacenter', 'edge', 'tiny' or 'training').
+
+    'Model MLC' is lower-cased and ``model_aliases`` (lower-case name -> name)
+    is applied on top, e.g. ``{'rnnt': 'rnn-t'}``. 'Quantity' and 'Value' hold
+    each result in canonical units (see ``units.UNITS``); rows with a unit the
+    registry does not know and token rates of benchmarks that are not LLMs are
+    kept and reported with a warning. ``versions`` limits the rows to those
+    versions and only reads their partitions.
+    """
+    # Imported here: the store is built on top of this module
+    from .store import read_division
+    df = read_division(division, versions, columns)
+
+    # stacklevel=3: the caller is one frame beyond the timed_load wrapper
+    if columns is None or {'Units', 'Quantity'} <= set(columns):
+        unknown = unknown_units(df)
+        if len(unknown):
+            warnings.warn(f'{division}: rows with units missing from the registry: {unknown.to_dict()}',
+                          stacklevel=3)
+    if columns is None or {'Units', 'Model MLC', 'tokens_per_sample'} <= set(columns):
+        mislabeled = mislabeled_tokens(df)
+        if len(mislabeled):
+            warnings.warn(f'{division}: token rates of benchmarks that are not LLMs, left unconverted: '
+                          f'{mislabeled.to_dict()}', stacklevel=3)
+
+    return apply_model_aliases(df, model_aliases)
@@ -0,0 +1,71 @@
+"""Vectorized parsing of the text result columns.
+
+'Result' mixes plain numbers, numbers with thousands separators
+('1,676,757.08'), links to submission code and placeholder text left over
+from the website export ('details', 'availableNVIDIA', ...). ``parse_numbers``
+turns such a column into floats in one vectorized pass and flags the cells
+that are not numbers, so callers never need per-row lambdas or regex filters.
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+    pc = None
+
+# Flags for cells that do not hold a number
+FLAGS = ['url', 'placeholder']
+
+NUMBER = r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$'
+URL = r'https?://'
+
+
+def _parse_arrow(values):
+    arr = pa.array(values.to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    text = pc.utf8_trim_whitespace(pc.replace_substring(pc.replace_substring(arr, ',', ''), '"', ''))
+    is_number = pc.fill_null(pc.match_substring_regex(text, NUMBER), False)
+    numbers = pc.cast(pc.if_else(is_number, text, pa.scalar(None, pa.string())), pa.float64())
+    is_url = pc.fill_null(pc.match_substring_regex(arr, URL, ignore_case=True), False)
+    return (numbers.to_numpy(zero_copy_only=False),
+            is_number.to_numpy(zero_copy_only=False),
+            is_url.to_numpy(zero_copy_only=False))
+
+
+def _parse_pandas(values):
+    # Most cells are plain numbers: only the ones that fail go through the string cleanup
+    numbers = pd.to_numeric(values, errors='coerce')
+    is_url = np.zeros(len(values), dtype=bool)
+    retry = (numbers.isna() & values.notna()).to_numpy()
+    if retry.any():
+        text = values[retry].astype(str)
+        clean = text.str.replace(',', '', regex=False).str.replace('"', '', regex=False).str.strip()
+        numbers[retry] = pd.to_numeric(clean, errors='coerce')
+        is_url[retry] = text.str.contains(URL, case=False, regex=True).to_numpy()
+    return numbers.to_numpy(dtype=float), numbers.notna().to_numpy(), is_url
+
+
+def parse_numbers(values):
+    """Parse a column of numeric text into floats.
+
+    Returns ``(numbers, flags)``: a float array with NaN where the cell is not
+    a number, and a categorical of ``FLAGS`` that is 'url' for links,
+    'placeholder' for any other text and missing for numbers and empty cells.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        # Already parsed at read time (e.g. thousands=',' on an all-numeric column)
+        return values.to_numpy(dtype=float), pd.Categorical([None] * len(values), categories=FLAGS)
+
+    values = values.astype(object)
+    if pa is not None:
+        numbers, is_number, is_url = _parse_arrow(values)
+    else:
+        numbers, is_number, is_url = _parse_pandas(values)
+
+    has_text = values.notna().to_numpy() & ~is_number
+    flags = np.where(is_url, 'url', np.where(has_text, 'placeholder', None))
+    return numbers, pd.Categorical(flags, categories=FLAGS)
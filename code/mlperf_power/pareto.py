@@ -0,0 +1,227 @@
+"""Pareto frontiers of performance vs power.
+
+A submission is on the frontier of its (model, scenario, version, kind) group
+when no other submission in the group is at least as good on both axes and
+better on one. The axes depend on the kind of pair in the efficiency table:
+
+    throughput      samples/s (higher is better)  vs  system power in W (lower)
+    latency         latency in s (lower)          vs  energy per sample in J (lower)
+    time_to_train   time to train in s (lower)    vs  energy per run in J (lower)
+
+so tiny is compared on latency vs energy per inference. ``pareto_flags`` marks
+the frontier rows of every group at once with a sort and a sweep: rows are
+sorted by group, then by the first axis (best first), and a row is on the
+frontier when its second axis beats the running best of the rows before it.
+That is O(n log n) for the sort and linear after it.
+
+Frontiers are cached per partition of the store like the leaderboards, and
+
+    PYTHONPATH=code python -m mlperf_power.pareto --division tiny --plot
+
+prints them and plots one panel per model.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .join import efficiency_cache, efficiency_digest
+from .loader import DIVISIONS, apply_model_aliases, cached_table
+from .store import concat_partitions, partition_keys, partitions
+
+# Bump whenever the frontier columns change so stale tables are not reused
+PARETO_VERSION = 1
+
+# Group columns, those missing from a division are left out (training has no Scenario)
+GROUP_KEYS = ['Model MLC', 'Scenario', 'version', 'kind']
+
+# kind -> ((x column, higher is better), (y column, higher is better))
+AXES = {
+    'throughput': (('performance', True), ('power_W', False)),
+    'latency': (('performance', False), ('energy_J', False)),
+    'time_to_train': (('performance', False), ('energy_J', False)),
+}
+
+# kind -> ((x label, scale), (y label, scale)) for plotting
+LABELS = {
+    'throughput': (('Throughput (samples/s)', 1.0), ('System power (W)', 1.0)),
+    'latency': (('Latency (ms)', 1e3), ('Energy per sample (uJ)', 1e6)),
+    'time_to_train': (('Time to train (min)', 1 / 60), ('Energy (MJ)', 1e-6)),
+}
+
+# System columns kept with every frontier entry
+ENTRY_COLUMNS = ['Public ID', 'Organization', 'accelerator_model_name', 'Accelerator Model Name',
+                 'Total Accelerators', 'samples_per_J']
+
+
+def _group_keys(table):
+    return [k for k in GROUP_KEYS if k in table.columns]
+
+
+def axes(table):
+    """Per-row (x, y) arrays, oriented so that lower is better on both axes."""
+    x = np.full(len(table), np.nan)
+    y = np.full(len(table), np.nan)
+    kinds = table['kind'].astype(str).to_numpy()
+    for kind, ((x_col, x_high), (y_col, y_high)) in AXES.items():
+        rows = kinds == kind
+        if rows.any():
+            x[rows] = table[x_col].to_numpy(dtype=float)[rows] * (-1 if x_high else 1)
+            y[rows] = table[y_col].to_numpy(dtype=float)[rows] * (-1 if y_high else 1)
+    return x, y
+
+
+def pareto_flags(table):
+    """Boolean Series, True for the rows on the frontier of their group.
+
+    Rows missing either axis are never on it. Identical points are either all on
+    the frontier or all off it.
+    """
+    keys = _group_keys(table)
+    x, y = axes(table)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    groups = table.groupby(keys, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    positions = np.flatnonzero(valid)
+    g, x, y = groups[positions], x[positions], y[positions]
+
+    # Sort by group, then x, then y: every row can only be dominated by rows before it
+    order = np.lexsort((y, x, g))
+    g, x, y = g[order], x[order], y[order]
+    starts = np.r_[True, g[1:] != g[:-1]]
+
+    # Best y of the rows before each row in its group (+inf for the first)
+    best = pd.Series(y).groupby(g).cummin().to_numpy()
+    before = np.where(starts, np.inf, np.r_[np.inf, best[:-1]])
+
+    # A run of identical points shares the verdict of its first row
+    same = ~starts & np.r_[False, (x[1:] == x[:-1]) & (y[1:] == y[:-1])]
+    run = np.cumsum(~same) - 1
+    first = np.flatnonzero(~same)
+    on = (y[first] < before[first])[run]
+
+    flags = np.zeros(len(table), dtype=bool)
+    flags[positions[order]] = on
+    return pd.Series(flags, index=table.index)
+
+
+def build_frontier(table):
+    """The frontier rows of every group of a paired efficiency table, in sweep order."""
+    keys = _group_keys(table)
+    columns = [c for c in ENTRY_COLUMNS if c in table.columns]
+    rows = table[pareto_flags(table).to_numpy()]
+    x, _ = axes(rows)
+    rows = rows.assign(_x=x).sort_values(keys + ['_x'], kind='stable')
+    rank = rows.groupby(keys, sort=False, dropna=False, observed=True).cumcount() + 1
+    rows = rows.assign(rank=rank.to_numpy())
+    return rows[keys + ['rank'] + columns + ['performance', 'power_W', 'energy_J']].reset_index(drop=True)
+
+
+def pareto_frontier(division, model_aliases=None, versions=None):
+    """Frontier rows of every (model, scenario, version, kind) group of ``division``.
+
+    ``model_aliases`` renames 'Model MLC' values after the frontiers are taken,
+    so groups that an alias merges keep separate frontiers.
+    """
+    frames = []
+    for version, entry in partitions(division, versions):
+        joined = efficiency_cache(division, version, entry)
+
+        def build(joined=joined, version=version):
+            table = cached_table(*joined)
+            if 'version' not in table.columns:
+                # Training has no 'version' column, its partition is the round
+                table = table.assign(version=version)
+            return build_frontier(table)
+
+        frames.append(cached_table(f'{division}-pareto-{version}', PARETO_VERSION, efficiency_digest(entry), build))
+    if not frames:
+        raise ValueError(f"No partitions of '{division}' for versions {sorted(versions)}")
+    return apply_model_aliases(concat_partitions(frames), model_aliases)
+
+
+def plot_frontier(ax, frontier, points=None, kind='throughput', label=None, color=None):
+    """Draw one group's frontier as a staircase on ``ax``, over its ``points`` if given.
+
+    The staircase bounds the region the frontier dominates. Both axes are
+    logarithmic and use the units of ``LABELS[kind]``.
+    """
+    (x_col, x_high), (y_col, _) = AXES[kind]
+    (x_label, x_scale), (y_label, y_scale) = LABELS[kind]
+    if points is not None:
+        ax.scatter(points[x_col] * x_scale, points[y_col] * y_scale, s=12, color=color, alpha=0.25,
+                   edgecolor='none')
+    line = frontier.sort_values(x_col, kind='stable')
+    ax.plot(line[x_col] * x_scale, line[y_col] * y_scale, marker='o', markersize=4, color=color,
+            label=label, drawstyle='steps-pre' if x_high else 'steps-post')
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlabel(x_label)
+    ax.set_ylabel(y_label)
+
+
+def plot_frontiers(frontier, points=None, by='Model MLC', hue='version', columns=4):
+    """One panel per ``by`` value (and kind), one staircase per ``hue`` value; returns the figure."""
+    import matplotlib.pyplot as plt
+
+    frontier = frontier.dropna(subset=[by])
+    panels = list(frontier.groupby([by, 'kind'], sort=True, observed=True).groups)
+    rows = -(-len(panels) // columns)
+    fig, axs = plt.subplots(rows, min(columns, len(panels)), figsize=(4 * min(columns, len(panels)), 3.5 * rows),
+                            squeeze=False)
+    hues = sorted(frontier[hue].dropna().astype(str).unique())
+    colors = dict(zip(hues, plt.rcParams['axes.prop_cycle'].by_key()['color'] * len(hues)))
+    for ax, (name, kind) in zip(axs.flat, panels):
+        panel = frontier[(frontier[by] == name).to_numpy() & (frontier['kind'] == kind).to_numpy()]
+        for value, group in panel.groupby(panel[hue].astype(str), sort=True):
+            group_points = None
+            if points is not None:
+                group_points = points[(points[by] == name).to_numpy() & (points['kind'] == kind).to_numpy()
+                                      & (points[hue].astype(str) == value).to_numpy()]
+            plot_frontier(ax, group, group_points, kind, label=value, color=colors[value])
+        ax.set_title(str(name))
+        ax.legend(fontsize=7)
+    for ax in list(axs.flat)[len(panels):]:
+        ax.set_visible(False)
+    return fig
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compute and plot the performance vs power Pareto frontiers.')
+    parser.add_argument('--division', action='append', choices=sorted(DIVISIONS),
+                        help='division (repeatable, default: all)')
+    parser.add_argument('--model', help="only models containing this text, e.g. 'resnet'")
+    parser.add_argument('--scenario', help="only this scenario, e.g. 'offline'")
+    parser.add_argument('--plot', action='store_true',
+                        help='also plot the frontiers to figures/pareto-<division> (render profile applies)')
+    args = parser.parse_args(argv)
+
+    from . import render
+    from .join import efficiency_table
+
+    for division in args.division or DIVISIONS:
+        frontier = pareto_frontier(division)
+        mask = np.ones(len(frontier), dtype=bool)
+        if args.model:
+            mask &= frontier['Model MLC'].astype(str).str.contains(args.model, case=False, regex=False).to_numpy()
+        if args.scenario and 'Scenario' in frontier.columns:
+            mask &= (frontier['Scenario'].astype(str).str.lower() == args.scenario.lower()).to_numpy()
+        frontier = frontier[mask]
+        print(f'== {division} ({len(frontier)} frontier rows)')
+        print(frontier.to_string(index=False) if len(frontier) else 'no matching rows')
+
+        if args.plot and len(frontier):
+            points = efficiency_table(division)
+            if 'version' not in points.columns:
+                points = points.assign(version=partition_keys(points))
+            if args.scenario and 'Scenario' in points.columns:
+                points = points[(points['Scenario'].astype(str).str.lower() == args.scenario.lower()).to_numpy()]
+            fig = plot_frontiers(frontier, points)
+            render.tight_layout(fig)
+            print(f'wrote {render.savefig(f"./figures/pareto-{division}.png", fig)}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""Local stand-in for a PTDaemon power server, and a collection benchmark.
+
+The measurement flow of measurement_tutorial.md needs a power analyzer behind
+PTDaemon. ``PowerServer`` answers the line-based PTDaemon commands the
+collection tooling uses, over TCP, from a synthetic meter:
+
+    Identify                        mock meter description
+    SR,V,<range> / SR,A,<range>     set the voltage/current range ('Auto' or a value)
+    Go,<interval ms>,<count>[,<mark>]
+                                    start sampling; the samples are streamed back as
+                                    PTDaemon log lines (see ptd.py), <count> 0 runs until Stop
+    Mark,<mark>                     change the mark of the following samples
+    Watts                           the last reading
+    Stop                            stop sampling
+    Quit                            close the connection
+
+Every command is answered with one line ('... succeeded' or 'Error: ...').
+Unlike PTDaemon, which writes its samples to a log that the power server
+transfers after the run, the samples are streamed as they are taken, so a
+collector sees them live. ``PROFILES`` are the synthetic noise profiles. A
+``loss`` fraction of the samples can be dropped to exercise loss accounting.
+
+    PYTHONPATH=code python -m mlperf_power.powerserver serve [--port 4950] [--profile bursty]
+
+runs a server. The benchmark starts one in a subprocess and measures the
+collection-to-CSV pipeline (receive, parse, write) at each sample rate:
+
+    PYTHONPATH=code python -m mlperf_power.powerserver bench [--rates 1,10,100,1000] [--seconds 10]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .ptd import parse_lines
+
+# Port of the MLCommons power server
+DEFAULT_PORT = 4950
+
+# Profile -> (relative noise sd, relative load swing, swing period in s)
+PROFILES = {
+    'steady': (0.005, 0.0, 1.0),
+    'noisy': (0.05, 0.0, 1.0),
+    'drift': (0.005, 0.1, 60.0),
+    'bursty': (0.02, 0.4, 2.0),
+}
+
+# Samples due are sent at most this often (s)
+TICK = 0.01
+
+# The collector parses and writes what it received this often (s), or every this many lines
+FLUSH_INTERVAL = 0.1
+FLUSH_LINES = 10_000
+
+BENCH_RATES = (1, 10, 100, 1000)
+
+BENCH_COLUMNS = ['rate_hz', 'samples', 'expected', 'loss_%', 'latency_p50_ms', 'latency_p99_ms',
+                 'ingest_samples_per_s', 'csv_bytes']
+
+
+def format_times(times):
+    """PTDaemon timestamps (UTC) of epoch seconds."""
+    return [time.strftime('%m-%d-%Y %H:%M:%S', time.gmtime(t)) + f'.{int(t % 1 * 1000):03d}' for t in times]
+
+
+class SyntheticMeter:
+    """Power readings of a synthetic load: ``base_W`` with a square swing and Gaussian noise."""
+
+    def __init__(self, base_W=500.0, profile='steady', volts=230.0, pf=0.98, seed=0):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile '{profile}', expected one of {list(PROFILES)}")
+        self.base_W = base_W
+        self.noise, self.swing, self.period = PROFILES[profile]
+        self.volts = volts
+        self.pf = pf
+        self.rng = np.random.default_rng(seed)
+        self.last = base_W
+
+    def read(self, times):
+        """(watts, volts, amps) at ``times`` (epoch seconds)."""
+        times = np.asarray(times, dtype=float)
+        load = np.where((times // (self.period / 2)) % 2 == 0, 1.0, 1.0 - self.swing)
+        watts = self.base_W * load * (1 + self.noise * self.rng.standard_normal(len(times)))
+        volts = self.volts * (1 + 0.001 * self.rng.standard_normal(len(times)))
+        amps = watts / (volts * self.pf)
+        if len(watts):
+            self.last = float(watts[-1])
+        return watts, volts, amps
+
+
+class PowerServer:
+    """Mock PTDaemon over TCP; every connection gets its own meter (seeded from ``seed``)."""
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, base_W=500.0, profile='steady', loss=0.0, seed=0):
+        self.host = host
+        self.port = port
+        self.base_W = base_W
+        self.profile = profile
+        self.loss = loss
+        self.seed = seed
+        self.connections = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        meter = SyntheticMeter(self.base_W, self.profile, seed=self.seed + self.connections)
+        rng = np.random.default_rng(self.seed + self.connections)
+        state = {'mark': '', 'task': None, 'ranges': {'V': 'Auto', 'A': 'Auto'}}
+
+        def reply(line):
+            writer.write(f'{line}\r\n'.encode())
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, *args = line.decode(errors='replace').strip().split(',')
+                if command == 'Identify':
+                    reply(f'Mock PTDaemon, synthetic {self.profile} meter, {self.base_W:g} W')
+                elif command == 'SR' and len(args) == 2 and args[0] in state['ranges']:
+                    state['ranges'][args[0]] = args[1]
+                    reply(f'Range {args[0]} changed')
+                elif command == 'Go' and len(args) >= 2:
+                    if state['task'] is not None:
+                        reply('Error: already sampling')
+                        continue
+                    try:
+                        interval, count = float(args[0]) / 1000, int(args[1])
+                    except ValueError:
+                        reply(f'Error: bad Go arguments {args}')
+                        continue
+                    if interval <= 0:
+                        reply('Error: interval must be positive')
+                        continue
+                    state['mark'] = args[2] if len(args) > 2 else state['mark']
+                    reply('Go command succeeded')
+                    state['task'] = asyncio.create_task(self._sample(writer, meter, rng, state, interval, count))
+                elif command == 'Mark' and args:
+                    state['mark'] = args[0]
+                    reply('Mark command succeeded')
+                elif command == 'Watts':
+                    reply(f'Watts,{meter.last:.6f}')
+                elif command == 'Stop':
+                    if state['task'] is not None:
+                        state['task'].cancel()
+                        await asyncio.gather(state['task'], return_exceptions=True)
+                        state['task'] = None
+                    reply('Stop command succeeded')
+                elif command == 'Quit':
+                    break
+                else:
+                    reply(f'Error: unknown command {line.decode(errors="replace").strip()!r}')
+                await writer.drain()
+        finally:
+            if state['task'] is not None:
+                state['task'].cancel()
+            writer.close()
+
+    async def _sample(self, writer, meter, rng, state, interval, count):
+        """Send the samples due every ``TICK``, timestamped on the sampling schedule.
+
+        When cancelled (by Stop), the samples that fell due since the last tick
+        are still sent, so a run has every sample up to its Stop.
+        """
+        start = time.time()
+        sent = 0
+
+        def send():
+            nonlocal sent
+            due = int((time.time() - start) / interval) + 1
+            if count:
+                due = min(due, count)
+            if due <= sent:
+                return
+            times = start + np.arange(sent, due) * interval
+            watts, volts, amps = meter.read(times)
+            keep = rng.random(len(times)) >= self.loss
+            lines = [f'Time,{t},Watts,{w:.6f},Volts,{v:.6f},Amps,{a:.6f},PF,{meter.pf:.6f},Mark,{state["mark"]}\r\n'
+                     for t, w, v, a in zip(format_times(times[keep]), watts[keep], volts[keep], amps[keep])]
+            writer.write(''.join(lines).encode())
+            sent = due
+
+        try:
+            while not count or sent < count:
+                await asyncio.sleep(min(TICK, interval))
+                send()
+                await writer.drain()
+        except asyncio.CancelledError:
+            send()
+            raise
+
+
+def collect_to_csv(host, port, rate, seconds, output, mark='bench'):
+    """Sample at ``rate`` Hz for ``seconds`` and write the samples to the CSV ``output``.
+
+    Received lines are parsed and written every ``FLUSH_INTERVAL`` seconds (or
+    ``FLUSH_LINES`` lines). Returns the samples written, the times Go and Stop
+    were sent, the samples' latency (time written - sample time, s) and the CPU
+    seconds spent parsing and writing.
+    """
+    received, latencies, busy = 0, [], 0.0
+    pending, flushed = [], time.time()
+
+    def flush():
+        nonlocal received, busy, flushed
+        started = time.process_time()
+        samples = parse_lines(pending)
+        if len(samples):
+            samples.to_csv(out, header=not received, index=False)
+            out.flush()
+            received += len(samples)
+            latencies.append(time.time() - samples['time'].to_numpy())
+        pending.clear()
+        busy += time.process_time() - started
+        flushed = time.time()
+
+    with socket.create_connection((host, port)) as conn, open(output, 'w', newline='') as out:
+        conn.settimeout(FLUSH_INTERVAL / 2)
+        began = time.time()
+        conn.sendall(f'Go,{1000 / rate:g},0,{mark}\r\n'.encode())
+        buffer, deadline, stopped, done = b'', began + seconds, None, False
+        while not done:
+            if stopped is None and time.time() >= deadline:
+                stopped = time.time()
+                conn.sendall(b'Stop\r\n')
+            try:
+                data = conn.recv(1 << 16)
+            except socket.timeout:
+                data = b''
+            else:
+                if not data:
+                    break
+            *lines, buffer = (buffer + data).split(b'\r\n')
+            for line in lines:
+                line = line.decode()
+                if line.startswith('Time,'):
+                    pending.append(line)
+                elif line.startswith('Error'):
+                    raise RuntimeError(f'power server: {line}')
+                elif line == 'Stop command succeeded':
+                    done = True
+            if pending and (done or len(pending) >= FLUSH_LINES or time.time() - flushed >= FLUSH_INTERVAL):
+                flush()
+        conn.sendall(b'Quit\r\n')
+    return received, began, stopped, (np.concatenate(latencies) if latencies else np.empty(0)), busy
+
+
+def expected_samples(begin, end, rate):
+    """Samples a run at ``rate`` Hz should have in its commanded window, from Go at ``begin`` to Stop at ``end``.
+
+    Counted from the commands rather than the samples received, so samples lost
+    at either edge of the run count as lost.
+    """
+    return int((end - begin) * rate) + 1 if end is not None and end >= begin else 0
+
+
+def start_server_process(port=0, profile='steady', loss=0.0):
+    """Run ``serve`` in a subprocess; returns the process and the port it listens on."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(Path(__file__).parent.parent),
+                                                                    os.environ.get('PYTHONPATH')])))
+    proc = subprocess.Popen([sys.executable, '-m', 'mlperf_power.powerserver', 'serve', '--port', str(port),
+                             '--profile', profile, '--loss', str(loss)],
+                            stdout=subprocess.PIPE, text=True, env=env)
+    line = proc.stdout.readline()
+    if not line.startswith('listening on'):
+        proc.kill()
+        raise RuntimeError(f'power server did not start: {line!r}')
+    return proc, int(line.rsplit(':', 1)[1])
+
+
+def bench(rates=BENCH_RATES, seconds=10.0, profile='steady', loss=0.0):
+    """One row of ``BENCH_COLUMNS`` per sample rate, against a local mock server."""
+    proc, port = start_server_process(profile=profile, loss=loss)
+    rows = []
+    try:
+        for rate in rates:
+            path = Path(tempfile.gettempdir()) / f'mlperf-collect-{os.getpid()}-{rate:g}hz.csv'
+            received, began, stopped, latency, busy = collect_to_csv('127.0.0.1', port, rate, seconds, path)
+            expected = expected_samples(began, stopped, rate)
+            rows.append({
+                'rate_hz': rate,
+                'samples': received,
+                'expected': expected,
+                'loss_%': max(expected - received, 0) / expected * 100 if expected else math.nan,
+                'latency_p50_ms': float(np.percentile(latency, 50)) * 1e3 if len(latency) else math.nan,
+                'latency_p99_ms': float(np.percentile(latency, 99)) * 1e3 if len(latency) else math.nan,
+                'ingest_samples_per_s': received / busy if busy else math.nan,
+                'csv_bytes': path.stat().st_size,
+            })
+            path.unlink()
+    finally:
+        proc.terminate()
+        proc.wait()
+    return rows
+
+
+async def _serve(args):
+    server = await PowerServer(args.host, args.port, args.base, args.profile, args.loss, args.seed).start()
+    print(f'listening on {server.host}:{server.port}', flush=True)
+    await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mock PTDaemon power server and collection benchmark.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='run a mock power server')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'0 picks a free port (default: {DEFAULT_PORT})')
+    serve.add_argument('--base', type=float, default=500.0, help='mean power in W (default: 500)')
+    serve.add_argument('--seed', type=int, default=0)
+    run = commands.add_parser('bench', help='benchmark the collection-to-CSV pipeline against a local server')
+    run.add_argument('--rates', default=','.join(map(str, BENCH_RATES)), help='sample rates in Hz')
+    run.add_argument('--seconds', type=float, default=10.0, help='seconds collected per rate (default: 10)')
+    run.add_argument('--output', help='also write the results to this JSON file')
+    for command in (serve, run):
+        command.add_argument('--profile', default='steady', choices=list(PROFILES))
+        command.add_argument('--loss', type=float, default=0.0, help='fraction of samples dropped (default: 0)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(_serve(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    rows = bench([float(r) for r in args.rates.split(',')], args.seconds, args.profile, args.loss)
+    print(f"{'rate_hz':>8} {'samples':>8} {'expected':>8} {'loss_%':>7} {'p50_ms':>8} {'p99_ms':>8} "
+          f"{'ingest/s':>10} {'csv_bytes':>10}")
+    for r in rows:
+        print(f"{r['rate_hz']:>8g} {r['samples']:>8} {r['expected']:>8} {r['loss_%']:>7.2f} "
+              f"{r['latency_p50_ms']:>8.2f} {r['latency_p99_ms']:>8.2f} {r['ingest_samples_per_s']:>10.0f} "
+              f"{r['csv_bytes']:>10}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(rows, indent=1) + '\n')
+        print(f'wrote {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,325 @@
+"""Startup and phase profiling of the figure scripts.
+
+Runs each code/fig*.py script in a fresh interpreter (``python -X importtime``)
+and splits its wall time into phases:
+
+    startup     interpreter launch until the script starts running
+    imports     top-level imports made by the script (and any lazy ones later)
+    load        loader calls (load_division, efficiency_table, read_csv), minus imports
+    transform   remaining time before the first matplotlib Figure is created
+    plot        remaining time after it, up to the end of the script
+    savefig     render.savefig, i.e. drawing and encoding the output file
+    teardown    end of the script until the interpreter has exited
+
+Import times are also broken down per top-level package from the importtime
+log. The results go to a JSON file; ``--baseline`` compares against an earlier
+one to spot regressions.
+
+Usage, from the repository root:
+
+    PYTHONPATH=code python -m mlperf_power.profiling [--only fig6,fig9] [--repeat 3]
+                                                     [--output figures/profile.json]
+                                                     [--baseline old.json]
+"""
+
+# Only the standard library is imported here: the child process must start the
+# script with nothing preloaded so its imports are measured in full
+import argparse
+import bisect
+import builtins
+import json
+import os
+import platform
+import re
+import runpy
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+CODE_DIR = Path(__file__).resolve().parent.parent
+REPO_DIR = CODE_DIR.parent
+DEFAULT_OUTPUT = REPO_DIR / 'figures' / 'profile.json'
+
+PHASES = ['startup', 'imports', 'load', 'transform', 'plot', 'savefig', 'teardown']
+
+# Packages whose version is recorded with the results
+PACKAGES = ['numpy', 'pandas', 'matplotlib', 'scipy', 'SciencePlots', 'pyarrow']
+
+# Written to stderr by the child right before the script runs
+_MARKER = 'mlperf_power.profiling: script start'
+_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+class _Timeline:
+    """Intervals recorded while the script runs in the child process."""
+
+    def __init__(self):
+        self.imports = []
+        self.first_figure = None
+        self._depth = 0
+        self._original = builtins.__import__
+
+    def track_imports(self):
+        original = builtins.__import__
+
+        def timed_import(name, *args, **kwargs):
+            start = time.perf_counter()
+            self._depth += 1
+            try:
+                return original(name, *args, **kwargs)
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.imports.append((start, time.perf_counter()))
+                    self._track_figures()
+
+        self._original = original
+        builtins.__import__ = timed_import
+
+    def untrack_imports(self):
+        builtins.__import__ = self._original
+
+    def _track_figures(self):
+        # Hook Figure creation as soon as matplotlib.figure has been imported
+        module = sys.modules.get('matplotlib.figure')
+        if module is None or getattr(module.Figure, '_profiled', False):
+            return
+        init = module.Figure.__init__
+        timeline = self
+
+        def profiled_init(self, *args, **kwargs):
+            if timeline.first_figure is None:
+                timeline.first_figure = time.perf_counter()
+            init(self, *args, **kwargs)
+
+        module.Figure.__init__ = profiled_init
+        module.Figure._profiled = True
+
+
+def _merge(intervals):
+    """Sorted, disjoint (starts, ends) covering ``intervals``."""
+    starts, ends = [], []
+    for s, e in sorted(intervals):
+        if starts and s <= ends[-1]:
+            ends[-1] = max(ends[-1], e)
+        else:
+            starts.append(s)
+            ends.append(e)
+    return starts, ends
+
+
+def _covered(merged, t):
+    starts, ends = merged
+    i = bisect.bisect_right(starts, t) - 1
+    return i >= 0 and t < ends[i]
+
+
+def split_phases(start, end, imports, loads, renders, first_figure):
+    """Seconds per phase of the script run between ``start`` and ``end``.
+
+    Imports take precedence over savefig, savefig over loads; the rest is
+    transform before ``first_figure`` and plot after it. Each kind of interval
+    is merged once and looked up by bisection, so this is O(n log n) in the
+    number of intervals.
+    """
+    points = sorted({start, end, *(t for iv in imports + loads + renders for t in iv)})
+    if first_figure is not None:
+        points = sorted(set(points) | {first_figure})
+    imports, renders, loads = _merge(imports), _merge(renders), _merge(loads)
+    phases = dict.fromkeys(['imports', 'load', 'transform', 'plot', 'savefig'], 0.0)
+    for a, b in zip(points, points[1:]):
+        if a < start or b > end:
+            continue
+        mid = (a + b) / 2
+        if _covered(imports, mid):
+            phase = 'imports'
+        elif _covered(renders, mid):
+            phase = 'savefig'
+        elif _covered(loads, mid):
+            phase = 'load'
+        elif first_figure is None or mid < first_figure:
+            phase = 'transform'
+        else:
+            phase = 'plot'
+        phases[phase] += b - a
+    return phases
+
+
+def parse_importtime(log, top=15):
+    """Cumulative milliseconds per top-level package from a ``-X importtime`` log.
+
+    Only imports after the child's start marker count, so the profiler's own
+    imports are left out.
+    """
+    packages = {}
+    _, _, log = log.rpartition(_MARKER)
+    for line in log.splitlines():
+        match = _IMPORTTIME.match(line)
+        if match is None:
+            continue
+        _, cumulative, indent, module = match.groups()
+        # Only outermost imports, their cumulative time covers everything below them
+        if indent == '':
+            package = module.split('.')[0]
+            packages[package] = packages.get(package, 0.0) + int(cumulative) / 1000
+    ranked = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)
+    return dict(ranked[:top])
+
+
+def _child(script, launched, output):
+    """Run ``script`` in this (fresh) interpreter and write its phase timeline to ``output``."""
+    entered = time.perf_counter()
+    entered_wall = time.time()
+    timeline = _Timeline()
+    timeline.track_imports()
+    os.chdir(REPO_DIR)
+
+    error = None
+    print(_MARKER, file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    try:
+        runpy.run_path(script, run_name='__main__')
+    except BaseException as e:
+        error = f'{type(e).__name__}: {e}'
+    end = time.perf_counter()
+    timeline.untrack_imports()
+
+    loader = sys.modules.get('mlperf_power.loader')
+    render = sys.modules.get('mlperf_power.render')
+    loads = [(r['start'], r['start'] + r['seconds']) for r in getattr(loader, 'LOAD_TIMES', [])]
+    renders = [(r['start'], r['start'] + r['seconds']) for r in getattr(render, 'RENDER_TIMES', [])]
+    phases = split_phases(start, end, timeline.imports, loads, renders, timeline.first_figure)
+    # Launch to script start, measured on the wall clock across the process boundary
+    phases['startup'] = entered_wall - launched + (start - entered)
+
+    with open(output, 'w') as f:
+        # The profiler's own post-processing is not part of the script's teardown
+        json.dump({'phases': phases, 'error': error, 'overhead': time.perf_counter() - end}, f)
+
+
+def profile_script(script, env=None):
+    """Phases (seconds), total wall time and import breakdown of one fresh run of ``script``."""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp:
+        output = tmp.name
+    try:
+        launched = time.time()
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'mlperf_power.profiling',
+             '--child', str(script), str(launched), output],
+            env=env, cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        wall = time.time() - launched
+        try:
+            with open(output) as f:
+                result = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            result = {'phases': None, 'error': f'profiler exited with status {proc.returncode}'}
+    finally:
+        os.unlink(output)
+    wall -= result.pop('overhead', 0.0)
+    result['wall'] = wall
+    if result['phases'] is not None:
+        result['phases']['teardown'] = max(0.0, wall - sum(result['phases'].values()))
+    result['import_breakdown_ms'] = parse_importtime(proc.stderr)
+    return result
+
+
+def _median_phases(runs):
+    ok = [r['phases'] for r in runs if r['phases'] is not None]
+    if not ok:
+        return None
+    return {phase: statistics.median(p[phase] for p in ok) for phase in PHASES}
+
+
+def _package_versions():
+    from importlib import metadata
+    versions = {}
+    for name in PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def run(figures, repeat=1):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(CODE_DIR), env.get('PYTHONPATH')]))
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'packages': _package_versions(),
+        'render_profile': os.environ.get('MLPERF_RENDER_PROFILE') or 'publication',
+        'repeat': repeat,
+        'phases': PHASES,
+        'figures': {},
+    }
+    for name, script in figures.items():
+        runs = [profile_script(script, env) for _ in range(repeat)]
+        report['figures'][name] = {
+            'script': script.name,
+            'median': _median_phases(runs),
+            'wall_median': statistics.median(r['wall'] for r in runs),
+            'import_breakdown_ms': runs[-1]['import_breakdown_ms'],
+            'errors': [r['error'] for r in runs if r['error']],
+            'runs': [{'phases': r['phases'], 'wall': r['wall']} for r in runs],
+        }
+        print(f'{name:<8} {report["figures"][name]["wall_median"]:6.2f}s', flush=True)
+    return report
+
+
+def print_report(report, baseline=None):
+    print(f"\n{'figure':<8}" + ''.join(f'{p:>10}' for p in PHASES) + f"{'wall':>9}")
+    for name, entry in report['figures'].items():
+        median = entry['median']
+        if median is None:
+            print(f"{name:<8} FAILED {'; '.join(entry['errors'])}")
+            continue
+        cells = ''.join(f'{median[p]:>10.3f}' for p in PHASES)
+        line = f"{name:<8}{cells}{entry['wall_median']:>9.3f}"
+        old = (baseline or {}).get('figures', {}).get(name)
+        if old:
+            delta = (entry['wall_median'] - old['wall_median']) / old['wall_median'] * 100
+            line += f'  ({delta:+.1f}% vs baseline)'
+        print(line)
+        if entry['errors']:
+            print(f"{'':<8} error: {entry['errors'][0]}")
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ['--child']:
+        _child(argv[1], float(argv[2]), argv[3])
+        return 0
+
+    # Reuse the build's figure discovery; imported here so the child stays light
+    from .build import discover_figures, select_figures
+
+    parser = argparse.ArgumentParser(description='Profile startup and phases of the figure scripts.')
+    parser.add_argument('--only', help='comma-separated figures to profile, e.g. fig6,fig9')
+    parser.add_argument('--repeat', type=int, default=1, help='fresh runs per figure, the median is reported')
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT, help='JSON file to write')
+    parser.add_argument('--baseline', type=Path, help='earlier JSON output to compare wall times against')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report = run(select_figures(discover_figures(), args.only), max(1, args.repeat))
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_report(report, baseline)
+    print(f'\nwrote {args.output}')
+    return 1 if any(e['errors'] for e in report['figures'].values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
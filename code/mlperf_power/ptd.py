@@ -0,0 +1,306 @@
+"""Streaming parser and summary of PTDaemon power logs.
+
+The published 'System Power (W)' of a submission is the average of the power
+analyzer samples PTDaemon logged during the LoadGen run. The power server
+hands the client a sample log with one line per reading:
+
+    Time,11-13-2020 20:39:24.476,Watts,56.500000,Volts,120.100000,Amps,0.570000,PF,0.824800,Mark,..._testing
+
+(key, value) pairs, the keys at even positions. Error and status lines are
+skipped. Hour-long datacenter and training runs log millions of samples, so
+logs are read in chunks and folded into a ``PowerSummary`` one chunk at a time:
+
+    read_samples   chunks of (time, watts, volts, amps, pf, mark) samples
+    in_window      keep the samples inside the LoadGen run window
+    PowerSummary   count, means, min/max, energy and percentiles of the run
+
+Memory is bounded by the chunk size: energy is integrated with the trapezoid
+rule carrying the last sample across chunks, and percentiles come from a fixed
+log-spaced histogram of the power readings (``PERCENTILE_RESOLUTION`` apart).
+
+The run window is the LoadGen 'power_begin' and 'power_end' of the run's
+mlperf_log_detail.txt, or given explicitly. To re-derive a submitted number:
+
+    PYTHONPATH=code python -m mlperf_power.ptd spl.txt --detail mlperf_log_detail.txt
+                                               [--mark testing] [--expected 532.1]
+"""
+
+import argparse
+import csv
+import io
+import json
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Timestamp format of the PTDaemon log and of LoadGen's power_begin/power_end
+TIME_FORMAT = '%m-%d-%Y %H:%M:%S.%f'
+
+# Log key -> sample column
+FIELDS = {'Time': 'time', 'Watts': 'watts', 'Volts': 'volts', 'Amps': 'amps', 'PF': 'pf', 'Mark': 'mark'}
+
+SAMPLE_COLUMNS = list(FIELDS.values())
+
+# Fields read per line; longer lines are error messages and are skipped
+MAX_FIELDS = 16
+
+# Relative width of a percentile bin, and the power range the bins cover (W).
+# Readings outside the range fall into the first or last bin.
+PERCENTILE_RESOLUTION = 1e-3
+WATTS_RANGE = (1e-3, 1e7)
+
+PERCENTILES = (1, 50, 90, 99, 99.9)
+
+_READ_OPTIONS = dict(header=None, names=range(MAX_FIELDS), dtype=str, quoting=csv.QUOTE_NONE, on_bad_lines='skip',
+                     skipinitialspace=True)
+
+
+def _floats(values):
+    try:
+        return values.to_numpy(dtype=float)
+    except (TypeError, ValueError):
+        # Some cell is not a number: the slower path that turns it into NaN
+        return pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+
+
+def parse_time(values):
+    """Seconds since the epoch of PTDaemon/LoadGen timestamps (NaN where unparseable).
+
+    The samples of a log share a few distinct minutes: those are parsed once and
+    the seconds are added as numbers, which is much faster than parsing every
+    timestamp.
+    """
+    values = pd.Series(values, dtype=object)
+    codes, minutes = pd.factorize(values.str.slice(0, 16))
+    parsed = pd.to_datetime(pd.Series(minutes, dtype=object), format=TIME_FORMAT[:14], errors='coerce')
+    base = np.where(parsed.isna(), np.nan, parsed.to_numpy('datetime64[ns]').astype(np.int64) / 1e9)
+    # Code -1 (missing value) picks the trailing NaN
+    return np.r_[base, np.nan][codes] + _floats(values.str.slice(17))
+
+
+def _samples(chunk):
+    """The sample lines of a raw chunk as typed columns."""
+    chunk = chunk[(chunk[0] == 'Time').to_numpy()]
+    first = chunk.iloc[0] if len(chunk) else None
+    columns = {}
+    for key, name in FIELDS.items():
+        # Position of the key in the first line, checked on every line
+        at = next((i for i in range(0, MAX_FIELDS - 1, 2) if first is not None and first[i] == key), None)
+        if at is None:
+            values = pd.Series(np.nan, index=chunk.index, dtype=object)
+        else:
+            values = chunk[at + 1].where(chunk[at] == key)
+        if name == 'time':
+            columns[name] = parse_time(values)
+        elif name == 'mark':
+            columns[name] = values.fillna('').to_numpy(dtype=object)
+        else:
+            columns[name] = _floats(values)
+    samples = pd.DataFrame(columns, columns=SAMPLE_COLUMNS)
+    return samples[~(np.isnan(samples['time'].to_numpy()) | np.isnan(samples['watts'].to_numpy()))]
+
+
+def parse_lines(lines):
+    """Samples of PTDaemon log ``lines`` (e.g. received from a power server), as ``read_samples`` yields them."""
+    if not lines:
+        return _samples(pd.DataFrame(columns=range(MAX_FIELDS), dtype=object))
+    return _samples(pd.read_csv(io.StringIO('\n'.join(lines)), **_READ_OPTIONS))
+
+
+def read_samples(path, chunksize=500_000, offset=0.0):
+    """Chunks of the samples of a PTDaemon log, in file order.
+
+    'time' is in seconds since the epoch, shifted by ``offset`` seconds (for a
+    power server whose clock differs from the SUT's). Lines without a time and
+    a power reading are skipped.
+    """
+    with pd.read_csv(path, chunksize=chunksize, **_READ_OPTIONS) as reader:
+        for chunk in reader:
+            samples = _samples(chunk)
+            if offset:
+                samples['time'] += offset
+            if len(samples):
+                yield samples
+
+
+def in_window(chunks, begin=None, end=None, mark=None):
+    """Restrict ``chunks`` to ``begin <= time <= end`` (seconds) and marks containing ``mark``."""
+    for samples in chunks:
+        time = samples['time'].to_numpy()
+        keep = np.ones(len(samples), dtype=bool)
+        if begin is not None:
+            keep &= time >= begin
+        if end is not None:
+            keep &= time <= end
+        if mark:
+            keep &= samples['mark'].str.contains(mark, regex=False).to_numpy()
+        if keep.any():
+            yield samples[keep]
+
+
+def loadgen_window(path):
+    """(begin, end) in seconds of the 'power_begin'/'power_end' entries of a LoadGen detail log."""
+    found = {}
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if '"power_begin"' not in line and '"power_end"' not in line:
+                continue
+            record = json.loads(line.split(':::MLLOG', 1)[-1])
+            found[record['key']] = parse_time([record['value']])[0]
+    missing = [k for k in ('power_begin', 'power_end') if k not in found]
+    if missing:
+        raise ValueError(f"{path} has no {' or '.join(missing)} entry")
+    return found['power_begin'], found['power_end']
+
+
+class PowerSummary:
+    """Constant-memory summary of a stream of power samples, fed one chunk at a time.
+
+    Samples are assumed to be in time order, as PTDaemon writes them.
+    """
+
+    _lo = math.log(WATTS_RANGE[0])
+    _step = math.log1p(PERCENTILE_RESOLUTION)
+    _bins = int(math.ceil((math.log(WATTS_RANGE[1]) - _lo) / _step)) + 1
+
+    def __init__(self):
+        self.count = 0
+        self.sums = dict.fromkeys(['watts', 'volts', 'amps', 'pf'], 0.0)
+        self.counts = dict.fromkeys(['volts', 'amps', 'pf'], 0)
+        self.min = np.inf
+        self.max = -np.inf
+        self.energy = 0.0
+        self.first = None
+        self.last = None
+        self.max_gap = 0.0
+        self.marks = set()
+        self.histogram = np.zeros(self._bins, dtype=np.int64)
+
+    def update(self, samples):
+        time = samples['time'].to_numpy(dtype=float)
+        watts = samples['watts'].to_numpy(dtype=float)
+        if not len(time):
+            return self
+        self.count += len(time)
+        self.sums['watts'] += float(watts.sum())
+        for name in self.counts:
+            values = samples[name].to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            self.sums[name] += float(values[valid].sum())
+            self.counts[name] += int(np.count_nonzero(valid))
+        self.min = min(self.min, float(watts.min()))
+        self.max = max(self.max, float(watts.max()))
+        if 'mark' in samples.columns:
+            self.marks.update(samples['mark'].unique())
+
+        # Trapezoid rule, continued from the last sample of the previous chunk
+        if self.last is not None:
+            time = np.r_[self.last[0], time]
+            watts = np.r_[self.last[1], watts]
+        else:
+            self.first = float(time[0])
+        dt = np.diff(time)
+        if len(dt):
+            self.energy += float(np.dot((watts[1:] + watts[:-1]) / 2, dt))
+            self.max_gap = max(self.max_gap, float(dt.max()))
+        self.last = (float(time[-1]), float(watts[-1]))
+
+        bins = np.floor((np.log(np.clip(samples['watts'].to_numpy(dtype=float), *WATTS_RANGE)) - self._lo)
+                        / self._step).astype(np.int64)
+        self.histogram += np.bincount(np.clip(bins, 0, self._bins - 1), minlength=self._bins)
+        return self
+
+    def percentile(self, q):
+        """Power (W) below which ``q`` percent of the samples fall, within ``PERCENTILE_RESOLUTION``."""
+        if not self.count:
+            return np.nan
+        rank = max(1, math.ceil(q / 100 * self.count))
+        i = int(np.searchsorted(np.cumsum(self.histogram), rank))
+        if i == 0:
+            return self.min
+        if i == self._bins - 1:
+            return self.max
+        # Geometric center of the bin, clipped to the exact extremes
+        value = math.exp(self._lo + (i + 0.5) * self._step)
+        return min(max(value, self.min), self.max)
+
+    def result(self, percentiles=PERCENTILES):
+        """Summary of the samples seen so far as a dict."""
+        duration = self.last[0] - self.first if self.count else np.nan
+        summary = {
+            'samples': self.count,
+            'begin': self.first if self.count else np.nan,
+            'end': self.last[0] if self.count else np.nan,
+            'duration_s': duration,
+            'avg_power_W': self.sums['watts'] / self.count if self.count else np.nan,
+            # Trapezoid energy over the duration, and the power it implies
+            'energy_J': self.energy if self.count else np.nan,
+            'integrated_power_W': self.energy / duration if self.count and duration > 0 else np.nan,
+            'min_power_W': self.min if self.count else np.nan,
+            'max_power_W': self.max if self.count else np.nan,
+            'max_gap_s': self.max_gap if self.count else np.nan,
+        }
+        for name, unit in [('volts', 'V'), ('amps', 'A'), ('pf', '')]:
+            n = self.counts[name]
+            summary[f'avg_{name}' + (f'_{unit}' if unit else '')] = self.sums[name] / n if n else np.nan
+        for q in percentiles:
+            summary[f'p{q:g}_power_W'] = self.percentile(q)
+        summary['marks'] = sorted(m for m in self.marks if m)
+        return summary
+
+
+def summarize_log(path, begin=None, end=None, mark=None, percentiles=PERCENTILES, chunksize=500_000,
+                  offset=0.0):
+    """``PowerSummary.result`` of the samples of a PTDaemon log within a run window.
+
+    ``begin`` and ``end`` are seconds since the epoch or timestamps in
+    ``TIME_FORMAT``; ``mark`` keeps only samples whose mark contains it (e.g.
+    'testing' to leave out the ranging run).
+    """
+    begin, end = (parse_time([t])[0] if isinstance(t, str) else t for t in (begin, end))
+    summary = PowerSummary()
+    for samples in in_window(read_samples(path, chunksize, offset), begin, end, mark):
+        summary.update(samples)
+    return summary.result(percentiles)
+
+
+def format_time(seconds):
+    if seconds is None or np.isnan(seconds):
+        return 'n/a'
+    return pd.Timestamp(seconds, unit='s').strftime(TIME_FORMAT)[:-3]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Summarize the power samples of a PTDaemon log over a run window.')
+    parser.add_argument('log', help='PTDaemon sample log (e.g. spl.txt)')
+    parser.add_argument('--detail', help='LoadGen mlperf_log_detail.txt with the power_begin/power_end of the run')
+    parser.add_argument('--begin', help=f'start of the window ({TIME_FORMAT}), overrides --detail')
+    parser.add_argument('--end', help=f'end of the window ({TIME_FORMAT}), overrides --detail')
+    parser.add_argument('--mark', help="only samples whose mark contains this text, e.g. 'testing'")
+    parser.add_argument('--offset', type=float, default=0.0, help='seconds added to the log timestamps')
+    parser.add_argument('--expected', type=float, help='published System Power (W) to check the average against')
+    parser.add_argument('--chunksize', type=int, default=500_000, help='lines read at a time')
+    args = parser.parse_args(argv)
+
+    begin, end = loadgen_window(args.detail) if args.detail else (None, None)
+    begin = args.begin or begin
+    end = args.end or end
+    summary = summarize_log(args.log, begin, end, args.mark, chunksize=args.chunksize, offset=args.offset)
+    for key, value in summary.items():
+        if key in ('begin', 'end'):
+            value = format_time(value)
+        elif key == 'marks':
+            value = ', '.join(value) or 'none'
+        elif isinstance(value, float):
+            value = f'{value:.6g}'
+        print(f'{key:<20} {value}')
+    if args.expected is not None and summary['samples']:
+        diff = (summary['avg_power_W'] - args.expected) / args.expected * 100
+        print(f"{'expected_power_W':<20} {args.expected:.6g} ({diff:+.3f}% from the log)")
+    return 0 if summary['samples'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
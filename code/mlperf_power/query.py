@@ -0,0 +1,269 @@
+"""Ad-hoc queries over the stored submission data.
+
+    query('datacenter', model='llama2-70b', scenario='offline', accelerator='H100',
+          best_by=['version'])
+
+answers "best samples/J for Llama2-70b offline on H100 per version" without a
+figure script. Filters are pushed down rather than applied to a full table:
+
+    version                     prunes the partitions of the store
+    model, scenario,            looked up in a per-partition index (value -> row
+    accelerator                 positions); only the matching rows are read from
+                                the memory-mapped partition
+    organization, units, kind   evaluated on the rows that are left
+
+Text filters are case-insensitive substrings ('h100'), shell-style patterns
+when they contain wildcards ('bert-99*'), or exact values when prefixed with '='
+('=bert-99'); a list of values matches any of them. Queries run on the paired efficiency table by default, or
+on the parsed rows with ``table='rows'``.
+
+Command line, from the repository root:
+
+    PYTHONPATH=code python -m mlperf_power.query --division datacenter --model llama2-70b \\
+        --scenario offline --accelerator h100 --best-by version
+"""
+
+import argparse
+import fnmatch
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .join import efficiency_digest, efficiency_partition_path, efficiency_table
+from .loader import DIVISIONS, cached_table, feather, load_division
+from .store import concat_partitions, partition_path, partitions
+
+# Bump whenever build_index changes so stale index files are not reused
+INDEX_VERSION = 1
+
+# Columns with a value -> row positions index
+INDEX_COLUMNS = ['Model MLC', 'Scenario', 'accelerator_model_name']
+
+# Filter name -> column(s) it applies to (any of them may match)
+FILTERS = {
+    'model': ['Model MLC'],
+    'scenario': ['Scenario'],
+    'accelerator': ['accelerator_model_name', 'Accelerator Model Name'],
+    'organization': ['Organization'],
+    'units': ['Units', 'Units_perf', 'Units_power'],
+    'kind': ['kind'],
+}
+
+# Column whose maximum ``best_by`` keeps, per table
+VALUES = {'efficiency': 'samples_per_J', 'rows': 'Value'}
+
+
+def _as_list(values):
+    if values is None:
+        return None
+    return [values] if isinstance(values, str) else list(values)
+
+
+def match(keys, patterns):
+    """Boolean mask of the ``keys`` matching any of ``patterns`` (see the module docstring)."""
+    lowered = np.array([str(k).lower() for k in keys], dtype=object)
+    mask = np.zeros(len(lowered), dtype=bool)
+    for pattern in patterns:
+        pattern = str(pattern).lower()
+        if pattern.startswith('='):
+            mask |= lowered == pattern[1:]
+        elif any(c in pattern for c in '*?['):
+            mask |= np.array([fnmatch.fnmatchcase(k, pattern) for k in lowered], dtype=bool)
+        else:
+            mask |= np.array([pattern in k for k in lowered], dtype=bool)
+    return mask
+
+
+def column_mask(values, patterns):
+    """Rows of ``values`` matching ``patterns``; matched once per distinct value."""
+    values = values.astype('category')
+    matched = np.append(match(values.cat.categories, patterns), False)
+    # Code -1 (missing value) picks the trailing False
+    return matched[values.cat.codes.to_numpy()]
+
+
+def build_index(df):
+    """Long-form index of ``df``: one (column, key, row) entry per indexed cell, sorted."""
+    parts = []
+    for col in INDEX_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col].astype('category')
+        codes = values.cat.codes.to_numpy()
+        rows = np.flatnonzero(codes >= 0)
+        parts.append(pd.DataFrame({
+            'column': col,
+            'key': values.cat.categories.astype(str).to_numpy()[codes[rows]],
+            'row': rows.astype(np.int64),
+        }))
+    if not parts:
+        return pd.DataFrame({'column': pd.Series(dtype=str), 'key': pd.Series(dtype=str),
+                             'row': pd.Series(dtype=np.int64)})
+    index = pd.concat(parts, ignore_index=True)
+    return index.sort_values(['column', 'key', 'row'], kind='stable').reset_index(drop=True)
+
+
+class Index:
+    """Row positions of every value of the indexed columns of one partition."""
+
+    def __init__(self, index):
+        self.rows = index['row'].to_numpy()
+        self.keys = {}
+        for col, group in index.groupby('column', sort=False):
+            keys = group['key'].to_numpy()
+            # Entries are sorted by key, so each key is one contiguous slice of rows
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            ends = np.r_[starts[1:], len(keys)]
+            offset = group.index[0]
+            self.keys[col] = (keys[starts], starts + offset, ends + offset)
+
+    def lookup(self, column, patterns):
+        """Sorted row positions whose ``column`` matches ``patterns``, or None if not indexed."""
+        if column not in self.keys:
+            return None
+        keys, starts, ends = self.keys[column]
+        selected = np.flatnonzero(match(keys, patterns))
+        if not len(selected):
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate([self.rows[starts[i]:ends[i]] for i in selected]))
+
+
+def _source(division, table, version, entry):
+    """(Feather path, cache name, digest) of one partition of ``table``."""
+    if table == 'efficiency':
+        return (efficiency_partition_path(division, version, entry), f'{division}-efficiency-{version}',
+                efficiency_digest(entry))
+    return partition_path(division, entry), f'{division}-{version}', entry['digest']
+
+
+def _read_partition(division, table, version, entry, filters):
+    path, name, digest = _source(division, table, version, entry)
+    source = feather.read_table(path, memory_map=True)
+
+    # Indexed filters: intersect the row positions of every filter
+    index = Index(cached_table(f'{name}-index', INDEX_VERSION, digest,
+                               lambda: build_index(source.to_pandas())))
+    rows, residual = None, {}
+    for filter_name, patterns in filters.items():
+        found = [index.lookup(c, patterns) for c in FILTERS[filter_name]]
+        found = [f for f in found if f is not None]
+        if not found:
+            residual[filter_name] = patterns
+            continue
+        hits = np.unique(np.concatenate(found))
+        rows = hits if rows is None else np.intersect1d(rows, hits, assume_unique=True)
+
+    if rows is not None:
+        source = source.take(rows)
+    df = source.to_pandas()
+    return _apply_filters(df, residual)
+
+
+def _apply_filters(df, filters):
+    for name, patterns in filters.items():
+        columns = [c for c in FILTERS[name] if c in df.columns]
+        mask = np.zeros(len(df), dtype=bool)
+        for col in columns:
+            mask |= column_mask(df[col], patterns)
+        df = df[mask]
+    return df.reset_index(drop=True)
+
+
+def best_rows(df, by, value):
+    """The row with the highest ``value`` in each ``by`` group."""
+    rows = df.dropna(subset=list(by) + [value])
+    best = rows.groupby(list(by), observed=True, sort=True)[value].idxmax()
+    return rows.loc[best.to_numpy()].reset_index(drop=True)
+
+
+def query(division=None, model=None, scenario=None, accelerator=None, organization=None,
+          version=None, units=None, kind=None, table='efficiency', best_by=None, value=None):
+    """Rows of ``table`` ('efficiency' or 'rows') matching every given filter.
+
+    ``division`` and every filter take one value or a list; without a division
+    all of them are queried and a 'division' column is added. ``best_by`` keeps
+    the row with the highest ``value`` (default: samples/J, or the canonical
+    value for ``table='rows'``) per group of those columns.
+    """
+    if table not in VALUES:
+        raise ValueError(f"Unknown table '{table}', expected one of {sorted(VALUES)}")
+    divisions = _as_list(division) or list(DIVISIONS)
+    filters = {name: _as_list(patterns) for name, patterns in
+               [('model', model), ('scenario', scenario), ('accelerator', accelerator),
+                ('organization', organization), ('units', units), ('kind', kind)]
+               if patterns is not None}
+    versions = _as_list(version)
+
+    results = []
+    for div in divisions:
+        # Version filters prune whole partitions before anything is read
+        selected = [(v, entry) for v, entry in partitions(div)
+                    if versions is None or match([v], versions)[0]]
+        if not selected:
+            continue
+        if feather is None:
+            # No Arrow support: filter the full table in memory
+            read = efficiency_table if table == 'efficiency' else load_division
+            df = _apply_filters(read(div, versions=[v for v, _ in selected]), filters)
+        else:
+            df = concat_partitions([_read_partition(div, table, v, entry, filters)
+                                    for v, entry in selected])
+        if len(divisions) > 1:
+            df.insert(0, 'division', div)
+        results.append(df)
+
+    df = pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+    if best_by and len(df):
+        df = best_rows(df, _as_list(best_by), value or VALUES[table])
+    return df
+
+
+DEFAULT_COLUMNS = {
+    'efficiency': ['Public ID', 'Organization', 'Model MLC', 'Scenario', 'accelerator_model_name',
+                   'Total Accelerators', 'version', 'kind', 'performance', 'power_W', 'samples_per_J'],
+    'rows': ['Public ID', 'Organization', 'Model MLC', 'Scenario', 'accelerator_model_name',
+             'version', 'Units', 'Quantity', 'Value'],
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query the MLPerf Power submission data.')
+    parser.add_argument('--division', action='append', choices=sorted(DIVISIONS),
+                        help='division to query (repeatable, default: all)')
+    for name in ['model', 'scenario', 'accelerator', 'organization', 'version', 'units', 'kind']:
+        parser.add_argument(f'--{name}', action='append', help=f'{name} filter (repeatable)')
+    parser.add_argument('--rows', action='store_true', help='query the parsed rows instead of the paired table')
+    parser.add_argument('--best-by', help='comma-separated columns, keep the best row of each group')
+    parser.add_argument('--value', help='column maximized by --best-by')
+    parser.add_argument('--sort', help='column to sort by, descending')
+    parser.add_argument('--limit', type=int, help='print at most this many rows')
+    parser.add_argument('--columns', help="comma-separated columns to print, or 'all'")
+    parser.add_argument('--format', choices=['table', 'csv', 'json'], default='table')
+    args = parser.parse_args(argv)
+
+    table = 'rows' if args.rows else 'efficiency'
+    df = query(args.division, model=args.model, scenario=args.scenario, accelerator=args.accelerator,
+               organization=args.organization, version=args.version, units=args.units,
+               kind=args.kind, table=table, value=args.value,
+               best_by=args.best_by.split(',') if args.best_by else None)
+
+    if args.sort:
+        df = df.sort_values(args.sort, ascending=False, kind='stable')
+    if args.limit is not None:
+        df = df.head(args.limit)
+    if args.columns != 'all':
+        wanted = args.columns.split(',') if args.columns else ['division'] + DEFAULT_COLUMNS[table]
+        df = df[[c for c in wanted if c in df.columns]]
+
+    if args.format == 'csv':
+        df.to_csv(sys.stdout, index=False)
+    elif args.format == 'json':
+        print(df.to_json(orient='records', date_format='iso', indent=2))
+    else:
+        print(df.to_string(index=False) if len(df) else 'no matching rows')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Render profiles for the figure scripts.
+
+Every script finishes with ``render.tight_layout()`` and ``render.savefig(path)``
+instead of calling pyplot directly, so one setting switches all of them:
+
+    draft         72 dpi PNG, no tight_layout, for quick looks and CI smoke runs
+    publication   300 dpi PNG as in the paper (default)
+    vector        PDF (or SVG with MLPERF_RENDER_FORMAT=svg), no rasterization
+
+The profile is read from ``MLPERF_RENDER_PROFILE`` (``--profile`` in the build
+sets it). All profiles render headless with the Agg backend. The time spent in
+each savefig is appended to ``RENDER_TIMES``.
+"""
+
+import os
+import time
+from pathlib import Path
+
+import matplotlib
+
+# The scripts only ever write files, never open windows
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+
+PROFILES = {
+    'draft': {'dpi': 72, 'tight_layout': False, 'format': 'png'},
+    'publication': {'dpi': 300, 'tight_layout': True, 'format': 'png'},
+    'vector': {'dpi': 300, 'tight_layout': True, 'format': 'pdf'},
+}
+DEFAULT_PROFILE = 'publication'
+VECTOR_FORMATS = ('pdf', 'svg')
+
+# One entry per savefig: output path, profile, start (perf_counter) and seconds
+# spent rendering and encoding
+RENDER_TIMES = []
+
+
+def active_profile():
+    """Name and settings of the profile selected by the environment."""
+    name = os.environ.get('MLPERF_RENDER_PROFILE') or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown render profile '{name}', expected one of {sorted(PROFILES)}")
+    profile = dict(PROFILES[name])
+    if name == 'vector':
+        fmt = os.environ.get('MLPERF_RENDER_FORMAT') or profile['format']
+        if fmt not in VECTOR_FORMATS:
+            raise ValueError(f"Unknown vector format '{fmt}', expected one of {VECTOR_FORMATS}")
+        profile['format'] = fmt
+    return name, profile
+
+
+def output_path(path, profile=None):
+    """``path`` with the extension of the profile's format."""
+    if profile is None:
+        profile = active_profile()[1]
+    return Path(path).with_suffix(f".{profile['format']}")
+
+
+def tight_layout(fig=None, **kwargs):
+    """``tight_layout`` on ``fig`` (default: the current figure), skipped in draft mode."""
+    if active_profile()[1]['tight_layout']:
+        (fig or plt.gcf()).tight_layout(**kwargs)
+
+
+def savefig(path, fig=None, **kwargs):
+    """Save ``fig`` (default: the current figure) with the active profile and time it."""
+    name, profile = active_profile()
+    path = output_path(path, profile)
+    kwargs.setdefault('dpi', profile['dpi'])
+    start = time.perf_counter()
+    (fig or plt.gcf()).savefig(path, format=profile['format'], **kwargs)
+    RENDER_TIMES.append({'output': str(path), 'profile': name, 'start': start,
+                         'seconds': time.perf_counter() - start})
+    return path
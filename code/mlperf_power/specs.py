@@ -0,0 +1,204 @@
+"""Declarative data specs for the figures built from individual submissions.
+
+Figures 6, 7, 9 and 11a plot numbers from a handful of named submissions (see
+figures.md). Each is described here as a list of entries, one per plotted
+number, giving the submission and the metric it comes from:
+
+    label      what the figure calls it (a bar, a point, a version)
+    division   store division of the submission
+    public_id  Public ID, e.g. '4.0-0063'
+    model      'Model MLC' value, matched exactly
+    scenario   Scenario value (None for tiny and training)
+    metric     what the value is, e.g. 'energy_MJ' or 'performance'
+    column     column of the efficiency table it comes from (default: metric)
+    scale      factor applied to the column (e.g. 1e-6 for 'energy_J' -> 'energy_MJ')
+    digits     decimals the value is rounded to, as published (None: not rounded)
+    base       (Public ID, model, scenario) of the results row whose ``column``
+               the value is divided by, for ratios (None: not a ratio)
+    value      the number itself, for entries that come from the submission's
+               logs or notes rather than its results (these are not looked up)
+
+``resolve(figure)`` looks every results entry up in the partitioned store: only
+the partitions of the versions named by the Public IDs are read, and the rows
+are matched on (Public ID, model, scenario). When a submission is re-run or
+corrected, refreshing the store refreshes the figure. An entry whose
+submission is missing raises a KeyError rather than plotting a stale number.
+
+    PYTHONPATH=code python -m mlperf_power.specs [figure7]
+
+prints the resolved values of one or all figures and where each came from.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from .join import efficiency_table
+from .loader import timed_load
+
+
+def entry(label, division, public_id, model, scenario=None, metric='energy_J', scale=1.0, digits=None,
+          value=None, column=None, base=None):
+    """One plotted number of a figure spec (see the module docstring)."""
+    if value is None:
+        column = column or metric
+    return {'label': label, 'division': division, 'public_id': public_id, 'model': model,
+            'scenario': scenario, 'metric': metric, 'column': column, 'scale': scale, 'digits': digits,
+            'value': value, 'base': base}
+
+
+def _llama2_lora(label, public_id):
+    return [
+        entry(label, 'training', public_id, 'llama2_70b_lora', metric='energy_MJ', column='energy_J', scale=1e-6,
+              digits=2),
+        entry(label, 'training', public_id, 'llama2_70b_lora', metric='time_to_train_min', column='performance',
+              scale=1 / 60, digits=3),
+    ]
+
+
+def _datacenter(label, model, scenario='Offline'):
+    return entry(label, 'datacenter', '4.0-0063', model, scenario)
+
+
+def _logged(label, division, public_id, model, metric, value, scenario=None):
+    return entry(label, division, public_id, model, scenario, metric, value=value)
+
+
+SPECS = {
+    # Llama2-70B LoRA on 8, 64 and 512 accelerators: total energy (MJ) and time-to-train (mins)
+    'figure6': [
+        *_llama2_lora(8, '4.0-0094'),
+        *_llama2_lora(64, '4.0-0096'),
+        *_llama2_lora(512, '4.0-0095'),
+        # Interconnect energy (MJ), from the notes of the submissions
+        _logged(8, 'training', '4.0-0094', 'llama2_70b_lora', 'interconnect_MJ', 0.0),
+        _logged(64, 'training', '4.0-0096', 'llama2_70b_lora', 'interconnect_MJ', 5.3),
+        _logged(512, 'training', '4.0-0095', 'llama2_70b_lora', 'interconnect_MJ', 7.2),
+    ],
+
+    # Energy per inference (J/sample) of one datacenter and one tiny system
+    'figure7': [
+        _datacenter('3D UNet-99.9', '3d-unet-99.9'),
+        _datacenter('Stable Diffusion', 'stable-diffusion-xl'),
+        _datacenter('DLRM-v2-99.9', 'dlrm-v2-99.9'),
+        _datacenter('GPTJ-99.9', 'gptj-99.9'),
+        _datacenter('Llama2-99.9', 'llama2-70b-99.9', scenario='Server'),
+        _datacenter('ResNet Inf', 'resnet'),
+        _datacenter('RetinaNet', 'retinanet'),
+        _datacenter('RNN-T', 'rnnt'),
+        _datacenter('BERT-99.9', 'bert-99.9'),
+        # As published; the results rows of 1.2-0004 in the tiny data hold other values
+        _logged('AutoEncoder', 'tiny', '1.2-0004', 'fc autoencoder', 'energy_J', 5.25e-6),
+        _logged('DSCNN', 'tiny', '1.2-0004', 'dscnn', 'energy_J', 18.56e-6),
+        _logged('MobileNet', 'tiny', '1.2-0004', 'mobilenetv1 (0.25x)', 'energy_J', 40.8e-6),
+        _logged('ResNet Tiny', 'tiny', '1.2-0004', 'resnet-v1', 'energy_J', 27.17e-6),
+    ],
+
+    # BERT-99.9 samples/J relative to BERT-99.0 on comparable NVIDIA DGX 8-accelerator
+    # systems. Only v4.0 is taken from the results; the Offline results rows of the
+    # earlier submissions give other ratios than their logs, which are plotted as logged
+    'figure9': [
+        _logged('v1.0', 'datacenter', '1.0-73', 'bert-99.9', 'relative_samples_per_J', 0.495, 'Offline'),
+        _logged('v1.1', 'datacenter', '1.1-048', 'bert-99.9', 'relative_samples_per_J', 0.489, 'Offline'),
+        _logged('v2.0', 'datacenter', '2.0-095', 'bert-99.9', 'relative_samples_per_J', 0.483, 'Offline'),
+        _logged('v2.1', 'datacenter', '2.1-0089', 'bert-99.9', 'relative_samples_per_J', 0.504, 'Offline'),
+        _logged('v3.1', 'datacenter', '3.1-0109', 'bert-99.9', 'relative_samples_per_J', 0.798, 'Offline'),
+        entry('v4.0', 'datacenter', '4.0-0063', 'bert-99.9', 'Offline', 'relative_samples_per_J',
+              column='samples_per_J', digits=3, base=('4.0-0063', 'bert-99.0', 'Offline')),
+    ],
+
+    # GIGABYTE R282 ResNet scores relative to v1.1 (the baseline, 1 by definition), from
+    # the submissions' logs (the Offline results rows give other ratios)
+    'figure11a': [
+        _logged(version, 'edge', public_id, 'resnet', metric, value, 'Offline')
+        for version, public_id, scores in [
+            ('v1.1', '1.1-124', [1, 1, 1]),
+            ('v2.0', '2.0-132', [1.097595568, 0.9118800273, 0.83079784]),
+            ('v3.0', '3.0-0101', [1.136507966, 0.9644309686, 0.8485914729]),
+            ('v3.1', '3.1-0127', [1.277909616, 0.9875033259, 0.7727489591]),
+        ]
+        for metric, value in zip(['perf/power', 'perf score', 'power score'], scores)
+    ],
+}
+
+
+def _version(public_id):
+    return 'v' + str(public_id).split('-')[0]
+
+
+def _lookup(division, entries):
+    """Efficiency-table values of the results ``entries`` of one division."""
+    versions = sorted({_version(row[0]) for e in entries for row in [(e['public_id'],), e['base']] if row})
+    table = efficiency_table(division, versions=versions)
+    keys = ['Public ID', 'Model MLC'] + (['Scenario'] if 'Scenario' in table.columns else [])
+    # Missing scenarios (tiny) match a spec scenario of None
+    table = table.assign(**{k: table[k].astype(object).fillna('').astype(str) for k in keys})
+    table = table.set_index(keys).sort_index()
+
+    def find(public_id, model, scenario, column):
+        key = (public_id, model) + ((scenario or '',) if 'Scenario' in keys else ())
+        try:
+            found = table.loc[[key], column]
+        except KeyError:
+            raise KeyError(f"{division} has no results for {dict(zip(keys, key))}") from None
+        if len(found) > 1:
+            raise KeyError(f"{division} has {len(found)} results for {dict(zip(keys, key))}")
+        return float(found.iloc[0])
+
+    values = []
+    for e in entries:
+        value = find(e['public_id'], e['model'], e['scenario'], e['column'])
+        if e['base'] is not None:
+            value /= find(*e['base'], e['column'])
+        values.append(value)
+    return values
+
+
+@timed_load
+def resolve(figure):
+    """One row per entry of ``SPECS[figure]`` with its 'value' and 'source'.
+
+    'source' is 'results' for values looked up in the store and 'logs' for
+    values given by the spec.
+    """
+    entries = [dict(e) for e in SPECS[figure]]
+    stored = [e for e in entries if e['value'] is None]
+    for division in dict.fromkeys(e['division'] for e in stored):
+        group = [e for e in stored if e['division'] == division]
+        for e, value in zip(group, _lookup(division, group)):
+            value *= e['scale']
+            e['value'] = value if e['digits'] is None else round(value, e['digits'])
+            e['source'] = 'results'
+    for e in entries:
+        e.setdefault('source', 'logs')
+    return pd.DataFrame(entries)[['label', 'metric', 'value', 'source', 'division', 'public_id', 'column',
+                                  'model', 'scenario']]
+
+
+def values(figure):
+    """``resolve(figure)`` as a label x metric table, labels and metrics in spec order."""
+    resolved = resolve(figure)
+    table = resolved.pivot(index='label', columns='metric', values='value')
+    return table.loc[resolved['label'].unique(), resolved['metric'].unique()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Resolve the data specs of the submission-level figures.')
+    parser.add_argument('figures', nargs='*', help=f"any of {', '.join(SPECS)} (default: all)")
+    args = parser.parse_args(argv)
+    unknown = [f for f in args.figures if f not in SPECS]
+    if unknown:
+        parser.error(f"unknown figure(s) {', '.join(unknown)}")
+
+    for figure in args.figures or SPECS:
+        resolved = resolve(figure)
+        print(f'== {figure} ({np.count_nonzero(resolved["source"] == "results")} of {len(resolved)} '
+              f'values from the results)')
+        print(resolved.to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
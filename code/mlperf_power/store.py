@@ -0,0 +1,258 @@
+"""Append-only store of the parsed data, partitioned by division and version.
+
+Layout, under ``STORE_DIR`` (``<repo>/store``, or ``MLPERF_STORE_DIR``):
+
+    <division>/_manifest.json
+    <division>/version=v4.0/part-<digest>.feather
+
+Each partition holds the parsed rows of one version as an uncompressed Arrow
+(Feather) file, the format of the loader's cache, so reads are memory-mapped and
+keep the categorical columns intact. The manifest lists the
+partitions in the order they were added, with their content digest and the
+file they came from. The shipped CSVs are mirrored into the store on first use
+and whenever they change, or the loader's ``parse_fingerprint`` does (its
+version or the tables parsing applies); only the partitions whose content
+changed are rewritten. A new round is added as a new partition without touching the others:
+
+    PYTHONPATH=code python -m mlperf_power.store append datacenter results_v5.0.csv
+
+A version is owned by the file it was stored from. Appending a file with a
+version that another file already holds is refused rather than merged, so a
+later sync of the shipped CSV can never drop appended rows.
+
+Readers list the partitions of the versions they need (partition pruning) and
+derived tables are cached per partition digest, so appending a round only
+computes the new round's derived tables.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from . import loader
+from .loader import REPO_DIR, division_digest, division_path, parse_division, parse_fingerprint, version_key
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # without pyarrow the CSVs are parsed on every run instead
+    feather = None
+
+STORE_DIR = Path(os.environ.get('MLPERF_STORE_DIR', REPO_DIR / 'store'))
+
+# Bump whenever the layout or manifest format changes
+STORE_VERSION = 2
+
+
+def partition_keys(df):
+    """Partition (version) of every row; training has no 'version' column and uses the Public ID prefix."""
+    if 'version' in df.columns:
+        return df['version'].astype(str)
+    return 'v' + df['Public ID'].astype(str).str.split('-').str[0]
+
+
+def frame_digest(df):
+    h = hashlib.sha256()
+    h.update(json.dumps([[c, str(t)] for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def split_partitions(df):
+    """``{version: rows}`` in order of first appearance."""
+    keys = partition_keys(df)
+    return {key: df[(keys == key).to_numpy()].reset_index(drop=True) for key in keys.unique()}
+
+
+def concat_partitions(frames):
+    """Concatenate partitions, unifying the categories of categorical columns.
+
+    Categories that differ between partitions are merged and sorted (ordered
+    ones by version), which matches parsing all the rows at once.
+    """
+    frames = [f for f in frames if len(f.columns)]
+    if not frames:
+        return pd.DataFrame()
+    frames = [f.copy() for f in frames]
+    for col, dtype in frames[0].dtypes.items():
+        if not isinstance(dtype, pd.CategoricalDtype):
+            continue
+        categories = [list(f[col].cat.categories) for f in frames]
+        if all(c == categories[0] for c in categories):
+            continue
+        merged = sorted(set().union(*categories), key=version_key if dtype.ordered else None)
+        for f in frames:
+            f[col] = f[col].cat.set_categories(merged)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _manifest_path(division):
+    return STORE_DIR / division / '_manifest.json'
+
+
+def load_manifest(division):
+    try:
+        with open(_manifest_path(division)) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        manifest = None
+    if manifest is None or manifest.get('store_version') != STORE_VERSION:
+        manifest = {'store_version': STORE_VERSION, 'sources': {}, 'partitions': {}}
+    return manifest
+
+
+def _save_manifest(division, manifest):
+    path = _manifest_path(division)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def write_partitions(division, df, source):
+    """Store every version in ``df`` as a partition of ``division``; return the versions rewritten.
+
+    A partition whose content is unchanged is left alone. Partitions belong to
+    the file they came from: a ValueError is raised, before anything is
+    written, if ``df`` holds a version stored from another ``source``.
+    """
+    manifest = load_manifest(division)
+    split = split_partitions(df)
+    taken = {version: manifest['partitions'][version]['source'] for version in split
+             if version in manifest['partitions'] and manifest['partitions'][version]['source'] != source}
+    if taken:
+        raise ValueError(f"{division}: {source} holds versions already stored from other files "
+                         f"({', '.join(f'{v} from {s}' for v, s in taken.items())}); rows are not merged "
+                         f"into another file's partition")
+    parsed_by = parse_fingerprint()
+    changed = []
+    for version, rows in split.items():
+        digest = frame_digest(rows)
+        entry = manifest['partitions'].get(version)
+        if entry and entry['digest'] == digest and entry['parsed_by'] == parsed_by:
+            continue
+        relative = f'version={version}/part-{digest[:16]}.feather'
+        path = STORE_DIR / division / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        feather.write_feather(rows, tmp, compression='uncompressed')
+        os.replace(tmp, path)
+        for stale in path.parent.glob('part-*.feather'):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+        manifest['partitions'][version] = {'file': relative, 'digest': digest, 'rows': len(rows),
+                                           'source': source, 'parsed_by': parsed_by}
+        changed.append(version)
+    _save_manifest(division, manifest)
+    return changed
+
+
+def sync(division):
+    """Mirror the division's shipped CSV into the store if it changed since the last sync."""
+    path = division_path(division)
+    source = path.relative_to(REPO_DIR).as_posix()
+    # The CSV's content and what parsing it depends on (the loader's version and tables)
+    key = [division_digest(division), parse_fingerprint()]
+    manifest = load_manifest(division)
+    if manifest['sources'].get(source) == key:
+        return []
+    df = parse_division(path)
+    changed = write_partitions(division, df, source)
+
+    manifest = load_manifest(division)
+    # Versions removed from the CSV are removed from the store too
+    present = set(partition_keys(df).unique())
+    for version, entry in list(manifest['partitions'].items()):
+        if entry['source'] == source and version not in present:
+            (STORE_DIR / division / entry['file']).unlink(missing_ok=True)
+            del manifest['partitions'][version]
+    manifest['sources'][source] = key
+    _save_manifest(division, manifest)
+    return changed
+
+
+def append(division, path):
+    """Parse a cleaned CSV of new rounds and add its versions to ``division``.
+
+    Appending the same file again updates its partitions; a version that is
+    already stored from another file (e.g. the shipped CSV) raises a ValueError.
+    """
+    path = Path(path).resolve()
+    try:
+        source = path.relative_to(REPO_DIR).as_posix()
+    except ValueError:
+        source = str(path)
+    return write_partitions(division, parse_division(path), source)
+
+
+def partitions(division, versions=None):
+    """``[(version, entry)]`` of the partitions of ``division`` holding ``versions`` (default: all)."""
+    wanted = None if versions is None else {str(v) for v in versions}
+    if feather is None:
+        # No Arrow support: partition the parsed CSV in memory
+        df = parse_division(division_path(division))
+        digest = division_digest(division)
+        return [(version, {'digest': f'{digest}-{version}', 'frame': rows})
+                for version, rows in split_partitions(df).items()
+                if wanted is None or version in wanted]
+
+    sync(division)
+    selected = [(version, entry) for version, entry in load_manifest(division)['partitions'].items()
+                if wanted is None or version in wanted]
+    for _, entry in selected:
+        loader.INPUTS_READ.add(partition_path(division, entry))
+    return selected
+
+
+def partition_path(division, entry):
+    return STORE_DIR / division / entry['file']
+
+
+def read_partition(division, entry, columns=None):
+    if 'frame' in entry:
+        return entry['frame'] if columns is None else entry['frame'][columns]
+    return feather.read_table(partition_path(division, entry), columns=columns, memory_map=True).to_pandas()
+
+
+def read_division(division, versions=None, columns=None):
+    """Parsed rows of ``division``, reading only the partitions of ``versions``."""
+    selected = partitions(division, versions)
+    if not selected:
+        raise ValueError(f"No partitions of '{division}' for versions {sorted(versions)}")
+    return concat_partitions([read_partition(division, entry, columns) for _, entry in selected])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manage the partitioned MLPerf Power store.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('sync', help='mirror the shipped CSVs into the store')
+    add = commands.add_parser('append', help='add the versions in a cleaned CSV to a division')
+    add.add_argument('division', choices=sorted(loader.DIVISIONS))
+    add.add_argument('path', type=Path)
+    commands.add_parser('list', help='list the partitions of every division')
+    args = parser.parse_args(argv)
+
+    if args.command == 'append':
+        try:
+            changed = append(args.division, args.path)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"{args.division}: wrote {', '.join(changed) or 'nothing (unchanged)'}")
+    elif args.command == 'sync':
+        for division in loader.DIVISIONS:
+            changed = sync(division)
+            print(f"{division}: {'wrote ' + ', '.join(changed) if changed else 'up to date'}")
+    else:
+        for division in loader.DIVISIONS:
+            for version, entry in load_manifest(division)['partitions'].items():
+                print(f"{division:<12} {version:<8} {entry['rows']:>7} rows  {entry['source']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""Memory-mapped binary traces of power samples.
+
+Text sample logs are re-parsed on every analysis. A trace holds the same
+samples as fixed-width records that are read with ``np.memmap``, so a time
+window of any channel is a zero-copy slice of the file:
+
+    header   b'MLPTRACE', format version (uint32), index length (uint32) and the
+             JSON index: one entry per channel with its first record, record
+             count, first and last time and mean sample interval
+    records  ``SAMPLE_DTYPE`` records, the samples of each channel contiguous
+             and in time order, starting at a multiple of ``ALIGNMENT`` bytes
+
+'time' is seconds since the epoch; channels without volts, amps or power
+factor (e.g. rectifier shelves reporting power only) store NaN. ``TraceWriter``
+takes samples in any channel order, spills each channel to its own temporary
+file and lays the channels out when it is closed, sorting the channels that
+arrived out of order by an external merge sort, so neither writing nor closing
+holds more than one chunk or ``BLOCK_RECORDS`` records in memory. ``Trace.energy`` integrates directly over the mapped
+records in blocks of ``BLOCK_RECORDS``.
+
+    PYTHONPATH=code python -m mlperf_power.traces convert spl.txt run.ptrace [--channel node0]
+                                                  [--offset -0.35]
+    PYTHONPATH=code python -m mlperf_power.traces info run.ptrace
+    PYTHONPATH=code python -m mlperf_power.traces energy run.ptrace [--begin ...] [--end ...]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .ptd import PERCENTILES, TIME_FORMAT, PowerSummary, format_time, in_window, parse_time, read_samples
+
+MAGIC = b'MLPTRACE'
+
+# Bump whenever the record layout or the index changes
+TRACE_VERSION = 1
+
+SAMPLE_DTYPE = np.dtype([('time', '<f8'), ('watts', '<f8'), ('volts', '<f4'), ('amps', '<f4'), ('pf', '<f4')])
+
+# Records start at a multiple of this many bytes
+ALIGNMENT = 64
+
+# Records integrated or copied at a time
+BLOCK_RECORDS = 1 << 20
+
+INDEX_COLUMNS = ['channel', 'first', 'count', 'begin', 'end', 'interval_s']
+
+_PREFIX = struct.Struct('<8sII')
+
+
+def to_records(samples):
+    """``samples`` (a frame or mapping with 'time' and 'watts') as ``SAMPLE_DTYPE`` records."""
+    records = np.empty(len(samples['time']), dtype=SAMPLE_DTYPE)
+    for name in SAMPLE_DTYPE.names:
+        records[name] = np.asarray(samples[name], dtype=float) if name in samples else np.nan
+    return records
+
+
+class TraceWriter:
+    """Write a trace from chunks of samples of any number of channels.
+
+    Each channel is spilled to a temporary file next to ``path`` as it arrives.
+    ``close`` copies the spills into the trace in blocks, merge-sorting the
+    channels that arrived out of time order (see ``_sort_spill``); use as a
+    context manager to have it closed (or discarded on error).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.spill_dir = Path(tempfile.mkdtemp(prefix=f'.{self.path.name}.', dir=self.path.parent))
+        self.spills = {}
+        # Channel -> {'count', 'begin', 'end', 'ordered'}
+        self.ranges = {}
+
+    def append(self, channel, samples):
+        records = samples if isinstance(samples, np.ndarray) else to_records(samples)
+        if not len(records):
+            return
+        channel = str(channel)
+        if channel not in self.spills:
+            self.spills[channel] = open(self.spill_dir / f'{len(self.spills)}.bin', 'wb')
+            self.ranges[channel] = {'count': 0, 'begin': np.inf, 'end': -np.inf, 'ordered': True}
+        time = records['time']
+        seen = self.ranges[channel]
+        seen['ordered'] &= bool(time[0] >= seen['end'] and np.all(time[1:] >= time[:-1]))
+        seen['count'] += len(records)
+        seen['begin'] = min(seen['begin'], float(time.min()))
+        seen['end'] = max(seen['end'], float(time.max()))
+        self.spills[channel].write(np.ascontiguousarray(records, dtype=SAMPLE_DTYPE).tobytes())
+
+    def index(self):
+        """The channel index of the trace as written so far (see ``INDEX_COLUMNS``)."""
+        index, first = [], 0
+        for channel, seen in self.ranges.items():
+            count = seen['count']
+            interval = (seen['end'] - seen['begin']) / (count - 1) if count > 1 else None
+            index.append({'channel': channel, 'first': first, 'count': count, 'begin': seen['begin'],
+                          'end': seen['end'], 'interval_s': interval})
+            first += count
+        return index
+
+    def close(self):
+        """Write the trace and remove the spill files; returns the trace path."""
+        tmp = self.path.with_suffix(f'{self.path.suffix}.{os.getpid()}.tmp')
+        try:
+            for f in self.spills.values():
+                f.close()
+            with open(tmp, 'wb') as out:
+                out.write(_header(self.index()))
+                for channel, f in self.spills.items():
+                    if self.ranges[channel]['ordered']:
+                        with open(f.name, 'rb') as spill:
+                            shutil.copyfileobj(spill, out, BLOCK_RECORDS * SAMPLE_DTYPE.itemsize)
+                    else:
+                        _sort_spill(Path(f.name), out)
+            os.replace(tmp, self.path)
+        finally:
+            tmp.unlink(missing_ok=True)
+            self.discard()
+        return self.path
+
+    def discard(self):
+        """Remove the spill files without writing the trace."""
+        for f in self.spills.values():
+            f.close()
+            Path(f.name).unlink(missing_ok=True)
+        self.spills = {}
+        if self.spill_dir.exists():
+            self.spill_dir.rmdir()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def _sort_spill(path, out):
+    """Write the records of the spill at ``path`` to ``out`` in time order (stable).
+
+    Runs of ``BLOCK_RECORDS`` records are sorted into a file next to the spill,
+    then merged in one pass: every step reads a slice of each run, takes the
+    records up to the smallest last (time, run) of the slices that do not reach
+    the end of their run, and sorts only those.
+    """
+    runs_path = path.with_suffix('.runs')
+    try:
+        spill = np.memmap(path, dtype=SAMPLE_DTYPE, mode='r')
+        runs = []
+        with open(runs_path, 'wb') as f:
+            for start in range(0, len(spill), BLOCK_RECORDS):
+                block = np.array(spill[start:start + BLOCK_RECORDS])
+                f.write(block[np.argsort(block['time'], kind='stable')].tobytes())
+                runs.append([start, min(start + BLOCK_RECORDS, len(spill))])
+        del spill
+
+        sorted_runs = np.memmap(runs_path, dtype=SAMPLE_DTYPE, mode='r')
+        step = max(BLOCK_RECORDS // len(runs), 1)
+        while runs:
+            heads = [sorted_runs[start:min(start + step, end)] for start, end in runs]
+            cut = [(head['time'][-1], i) for i, (run, head) in enumerate(zip(runs, heads))
+                   if run[0] + len(head) < run[1]]
+            # Ties at the limit are taken from the runs up to the limiting one, the
+            # rest may continue past their slice
+            limit, last = min(cut) if cut else (np.inf, len(runs))
+            parts = []
+            for i, (run, head) in enumerate(zip(runs, heads)):
+                n = int(np.searchsorted(head['time'], limit, side='right' if i <= last else 'left'))
+                parts.append(head[:n])
+                run[0] += n
+            # Runs are concatenated in spill order so the sort keeps ties in arrival order
+            merged = np.concatenate(parts)
+            out.write(merged[np.argsort(merged['time'], kind='stable')].tobytes())
+            runs = [run for run in runs if run[0] < run[1]]
+        del sorted_runs
+    finally:
+        runs_path.unlink(missing_ok=True)
+
+
+def _header(index):
+    text = json.dumps({'version': TRACE_VERSION, 'channels': index}).encode()
+    length = -(-(_PREFIX.size + len(text)) // ALIGNMENT) * ALIGNMENT - _PREFIX.size
+    return _PREFIX.pack(MAGIC, TRACE_VERSION, length) + text.ljust(length)
+
+
+def write_trace(path, channels):
+    """Write ``{channel: samples}`` to a trace at ``path``; returns the path."""
+    with TraceWriter(path) as writer:
+        for channel, samples in channels.items():
+            writer.append(channel, samples)
+    return writer.path
+
+
+class Trace:
+    """A trace file opened for reading, its records memory-mapped."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            magic, version, length = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f'{self.path} is not a power trace')
+            if version != TRACE_VERSION:
+                raise ValueError(f'{self.path} is trace version {version}, expected {TRACE_VERSION}')
+            header = json.loads(f.read(length))
+        self.index = pd.DataFrame(header['channels'], columns=INDEX_COLUMNS).set_index('channel')
+        total = int(self.index['count'].sum())
+        self.records = np.memmap(self.path, dtype=SAMPLE_DTYPE, mode='r', offset=_PREFIX.size + length,
+                                 shape=(total,)) if total else np.empty(0, dtype=SAMPLE_DTYPE)
+
+    @property
+    def channels(self):
+        return list(self.index.index)
+
+    def samples(self, channel, begin=None, end=None):
+        """Records of ``channel`` with ``begin <= time <= end``, a view of the mapped file."""
+        first, count = (int(v) for v in self.index.loc[str(channel), ['first', 'count']])
+        records = self.records[first:first + count]
+        time = records['time']
+        lo = 0 if begin is None else int(np.searchsorted(time, begin, side='left'))
+        hi = count if end is None else int(np.searchsorted(time, end, side='right'))
+        return records[lo:hi]
+
+    def energy(self, channel, begin=None, end=None):
+        """Trapezoid energy (J) of ``channel`` between its first and last sample in the window."""
+        records = self.samples(channel, begin, end)
+        energy = 0.0
+        # Blocks overlap by one record so no interval is lost between them
+        for start in range(0, max(len(records) - 1, 0), BLOCK_RECORDS):
+            block = records[start:start + BLOCK_RECORDS + 1]
+            watts = block['watts']
+            energy += float(np.dot((watts[1:] + watts[:-1]) / 2, np.diff(block['time'])))
+        return energy
+
+    def blocks(self, channel, begin=None, end=None):
+        """The window of ``channel`` as frames of at most ``BLOCK_RECORDS`` samples."""
+        records = self.samples(channel, begin, end)
+        for start in range(0, len(records), BLOCK_RECORDS):
+            yield pd.DataFrame(records[start:start + BLOCK_RECORDS])
+
+    def summary(self, channel, begin=None, end=None, percentiles=PERCENTILES):
+        """``ptd.PowerSummary`` result of the window of ``channel``."""
+        summary = PowerSummary()
+        for block in self.blocks(channel, begin, end):
+            summary.update(block)
+        return summary.result(percentiles)
+
+
+def convert_log(log, path, channel='system', begin=None, end=None, mark=None, chunksize=500_000, offset=0.0):
+    """Stream the samples of a PTDaemon log (``ptd.read_samples``) into a one-channel trace."""
+    with TraceWriter(path) as writer:
+        for samples in in_window(read_samples(log, chunksize, offset), begin, end, mark):
+            writer.append(channel, samples)
+    return writer.path
+
+
+def _time(text):
+    return None if text is None else parse_time([text])[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert, inspect and integrate memory-mapped power traces.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert = commands.add_parser('convert', help='convert a PTDaemon log to a trace')
+    convert.add_argument('log')
+    convert.add_argument('trace')
+    convert.add_argument('--channel', default='system', help='channel name (default: system)')
+    convert.add_argument('--offset', type=float, default=0.0,
+                         help="seconds added to the log's times, for a power server whose clock differs "
+                              "from the SUT's (default: 0)")
+    convert.add_argument('--mark', help="only samples whose mark contains this text, e.g. 'testing'")
+    info = commands.add_parser('info', help='print the channel index of a trace')
+    info.add_argument('trace')
+    energy = commands.add_parser('energy', help='energy and average power of every channel over a window')
+    energy.add_argument('trace')
+    energy.add_argument('--channel', action='append', help='channel (repeatable, default: all)')
+    for command in (convert, energy):
+        command.add_argument('--begin', help=f'start of the window ({TIME_FORMAT})')
+        command.add_argument('--end', help=f'end of the window ({TIME_FORMAT})')
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        path = convert_log(args.log, args.trace, args.channel, _time(args.begin), _time(args.end), args.mark,
+                           offset=args.offset)
+        args.trace = path
+    trace = Trace(args.trace)
+    if args.command in ('convert', 'info'):
+        index = trace.index.assign(begin=trace.index['begin'].map(format_time),
+                                   end=trace.index['end'].map(format_time))
+        print(f'{trace.path} ({len(trace.records)} samples, {trace.path.stat().st_size} bytes)')
+        print(index.to_string() if len(index) else 'no channels')
+        return 0
+
+    rows = []
+    for channel in args.channel or trace.channels:
+        window = trace.samples(channel, _time(args.begin), _time(args.end))
+        duration = float(window['time'][-1] - window['time'][0]) if len(window) > 1 else np.nan
+        joules = trace.energy(channel, _time(args.begin), _time(args.end))
+        rows.append((channel, len(window), duration, joules, joules / duration if duration > 0 else np.nan))
+    print(pd.DataFrame(rows, columns=['channel', 'samples', 'duration_s', 'energy_J', 'avg_power_W'])
+          .to_string(index=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
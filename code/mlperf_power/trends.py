@@ -0,0 +1,59 @@
+"""Best-efficiency-per-version trends.
+
+The trend figures plot, for each benchmark, the best efficiency of any single
+submission at or before each version (see figures.md). ``efficiency_frontier``
+computes the per-version best and its running-max envelope for all benchmarks
+in one pass, and records which submission sets the frontier at each version.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def label_models(models, labels, exact=False):
+    """Map each 'Model MLC' value to the first of ``labels`` it matches.
+
+    Matching is case-insensitive, on substrings unless ``exact``; values that
+    match no label become missing. Only the categories are matched, so the cost
+    does not grow with the number of rows.
+    """
+    models = models.astype('category')
+
+    def match(name):
+        for label in labels:
+            if (name == label.lower()) if exact else (label.lower() in name.lower()):
+                return label
+        return None
+
+    matched = np.array([match(name) for name in models.cat.categories] + [None], dtype=object)
+    # Code -1 (missing model) picks the trailing None
+    values = matched[models.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical(values, categories=list(labels)), index=models.index)
+
+
+def efficiency_frontier(table, value='samples_per_J', by='Model MLC', order=('version', 'date'),
+                        id_column='Public ID'):
+    """Per-version best ``value`` of each ``by`` group and its non-decreasing envelope.
+
+    Returns one row per (group, *order) with:
+
+        best          highest value submitted in that version
+        best_id       ``id_column`` (the Public ID) of that submission
+        frontier      highest value submitted in that version or any earlier one
+        frontier_id   Public ID of the submission holding the frontier
+
+    ``table`` can hold submissions or leaderboard records (``id_column='best_id'``).
+    """
+    keys = [by] + list(order)
+    rows = table.dropna(subset=keys + [value])
+
+    # Index of the best submission in every (group, version) in one groupby pass
+    best_rows = rows.groupby(keys, observed=True, sort=True)[value].idxmax()
+    best = rows.loc[best_rows.to_numpy(), keys + [value, id_column]]
+    best = best.rename(columns={value: 'best', id_column: 'best_id'}).reset_index(drop=True)
+
+    best['frontier'] = best.groupby(by, observed=True)['best'].cummax()
+    # A version sets the frontier when it matches the running max (ties go to the newer one)
+    sets_record = best['best'] >= best['frontier']
+    best['frontier_id'] = best['best_id'].where(sets_record).groupby(best[by], observed=True).ffill()
+    return best
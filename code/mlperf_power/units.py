@@ -0,0 +1,73 @@
+"""Registry of the raw 'Units' strings found in the cleaned CSVs.
+
+Submitters spelled the same unit many ways ('System Power (W)', 'Power (W)',
+'Watts', ...). ``UNITS`` maps every raw string to a canonical quantity and the
+factor that converts the raw value into it. ``normalize_units`` applies the
+registry when a file is parsed: the lookup runs on the categories of 'Units'
+and is broadcast to the rows by category code. The registry is part of the
+loader's ``parse_fingerprint``, so editing it re-parses the stored data.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Canonical quantities and their units
+QUANTITIES = [
+    'throughput_samples_s',  # samples/s
+    'power_W',               # average system power, W
+    'energy_J_per_sample',   # J per sample (per query for Single/MultiStream)
+    'energy_J',              # J for a whole training run
+    'latency_s',             # s per sample, or time-to-train for training
+]
+
+# Raw 'Units' value -> (canonical quantity, scale to the canonical unit)
+UNITS = {
+    'queries/s': ('throughput_samples_s', 1.0),
+    'Queries/s': ('throughput_samples_s', 1.0),
+    'samples/s': ('throughput_samples_s', 1.0),
+    'Samples/s': ('throughput_samples_s', 1.0),
+    # LLM token rates, divided by the benchmark's output tokens per sample by
+    # workloads.normalize_tokens
+    'Tokens/s': ('throughput_samples_s', 1.0),
+
+    'System Power (W)': ('power_W', 1.0),
+    'Power (W)': ('power_W', 1.0),
+    'System Power': ('power_W', 1.0),
+    'Watts': ('power_W', 1.0),
+
+    'System energy (J) per stream*': ('energy_J_per_sample', 1.0),
+    'System energy (mJ) per stream*': ('energy_J_per_sample', 1e-3),
+    'millijoules': ('energy_J_per_sample', 1e-3),
+    'Energy in uJ': ('energy_J_per_sample', 1e-6),
+    'kJ': ('energy_J', 1e3),
+
+    'latency in ms': ('latency_s', 1e-3),
+    'Latency (ms)': ('latency_s', 1e-3),
+    'Latency in ms': ('latency_s', 1e-3),
+    'Latency (In minutes)': ('latency_s', 60.0),
+}
+
+
+def normalize_units(df, result):
+    """Add 'Quantity' (categorical) and 'Value' (``result`` in canonical units) to ``df``.
+
+    Rows whose unit is not in the registry keep a missing quantity and value;
+    ``unknown_units`` lists them.
+    """
+    units = df['Units'].astype('category')
+    categories = units.cat.categories
+    quantity = np.array([UNITS.get(u, (None, np.nan))[0] for u in categories] + [None], dtype=object)
+    scale = np.array([UNITS.get(u, (None, np.nan))[1] for u in categories] + [np.nan])
+
+    # Code -1 (missing unit) picks the trailing sentinel
+    codes = units.cat.codes.to_numpy()
+    df['Quantity'] = pd.Categorical(quantity[codes], categories=QUANTITIES)
+    df['Value'] = df[result].to_numpy() * scale[codes]
+    return df
+
+
+def unknown_units(df):
+    """Rows per raw unit string that the registry does not know, most common first."""
+    unknown = df.loc[df['Units'].notna() & df['Quantity'].isna(), 'Units']
+    counts = unknown.astype(str).value_counts()
+    return counts[counts > 0]
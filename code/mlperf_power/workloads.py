@@ -0,0 +1,214 @@
+"""Workload catalog and compute-normalized efficiency.
+
+Samples/J cannot be compared across benchmarks: a Stable Diffusion sample costs
+about 10^10 times the compute of an AutoEncoder sample. ``WORKLOADS`` lists the
+multiply-accumulates per sample of each benchmark, from the public benchmark
+specifications, so efficiency can be put per unit of compute:
+
+    J_per_MAC        energy per sample / MACs per sample
+    MAC_per_s_per_W  throughput x MACs per sample / power, i.e. MACs per joule
+
+'Model MLC' values are matched to the catalog without their accuracy target
+('bert-99.9' -> 'bert') and through ``ALIASES``. Benchmarks missing from the
+catalog (ssd-large, the original DLRM, training) get missing values.
+
+    PYTHONPATH=code python -m mlperf_power.workloads --division datacenter --by accelerator_model_name
+
+ranks hardware by the best MACs per joule it reached on any benchmark.
+
+LLM benchmarks report tokens/s from v4.0 on, and their output length differs
+by benchmark and round. ``TOKENS_PER_SAMPLE`` lists the output tokens per sample
+of each (benchmark, version); ``normalize_tokens`` runs when a file is parsed and
+turns token rates into samples/s with it, so every table and figure sees the
+same samples. Token rates of an LLM benchmark in a round missing from the table
+use the benchmark's latest listed length and are flagged in 'tokens_assumed'.
+Token rates of other benchmarks (mislabeled rows, e.g. dlrm-v2 in 4.1-0049) are
+left as they are; ``mislabeled_tokens`` counts them and the loader warns.
+
+This module is imported by the loader, so the join is only imported where the
+efficiency table is read.
+"""
+
+import argparse
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Benchmark -> MACs per sample
+WORKLOADS = {
+    # Tiny
+    'fc autoencoder': 264192,
+    'dscnn': 2664768,
+    'mobilenetv1 (0.25x)': 7491968,
+    'resnet-v1': 12534400,
+    # Inference
+    'resnet': 4089282560,
+    'retinanet': 2.01e11,
+    'rnnt': 6314132597,
+    'bert': 59793997800,
+    'dlrm-v2': 4328225500,
+    '3d-unet': 3.425e13,
+    'gptj': 5.3075e12,
+    'llama2-70b': 2.32727e13,
+    'stable-diffusion-xl': 1.35394e14,
+}
+
+# LLM benchmark -> {version: mean output tokens per sample of its dataset}
+TOKENS_PER_SAMPLE = {
+    'gptj': {'v4.1': 69.0},
+    'llama2-70b': {'v4.0': 292, 'v4.1': 292},
+    'mixtral-8x7b': {'v4.1': 145.9},
+}
+
+# Raw 'Units' values that are token rates
+TOKEN_UNITS = ['Tokens/s']
+
+# Divisions with a catalog (training benchmarks have no MAC counts)
+INFERENCE_DIVISIONS = ['datacenter', 'edge', 'tiny']
+
+# Other spellings of catalog benchmarks
+ALIASES = {
+    'rnn-t': 'rnnt',
+}
+
+# Accuracy target suffix of inference benchmark names ('-99', '-99.0', '-99.9')
+_ACCURACY = re.compile(r'-99(\.\d)?$')
+
+COMPUTE_COLUMNS = ['workload', 'macs_per_sample', 'J_per_MAC', 'MAC_per_s_per_W']
+
+
+def benchmark_name(model):
+    """'Model MLC' value without its accuracy target and with ``ALIASES`` applied."""
+    name = _ACCURACY.sub('', str(model).strip().lower())
+    return ALIASES.get(name, name)
+
+
+def workload_name(model):
+    """Catalog key of a 'Model MLC' value, or None if it is not in the catalog."""
+    name = benchmark_name(model)
+    return name if name in WORKLOADS else None
+
+
+def catalog_lookup(models):
+    """Frame of 'workload' and 'macs_per_sample' for every model.
+
+    Looked up once per distinct model and broadcast to the rows by category code.
+    """
+    models = models.astype('category')
+    names = [workload_name(m) for m in models.cat.categories] + [None]
+    macs = np.array([WORKLOADS[n] if n else np.nan for n in names], dtype=float)
+    # Code -1 (missing model) picks the trailing sentinel
+    codes = models.cat.codes.to_numpy()
+    return pd.DataFrame({
+        'workload': pd.Categorical(np.array(names, dtype=object)[codes], categories=list(WORKLOADS)),
+        'macs_per_sample': macs[codes],
+    }, index=models.index)
+
+
+def _version_key(version):
+    return tuple(int(part) for part in re.findall(r'\d+', version))
+
+
+def _tokens(model, version):
+    """(output tokens per sample, listed) of a model and version; the latest listed round's if not listed."""
+    lengths = TOKENS_PER_SAMPLE.get(benchmark_name(model))
+    if not lengths:
+        return np.nan, False
+    if version in lengths:
+        return lengths[version], True
+    return lengths[max(lengths, key=_version_key)], False
+
+
+def tokens_per_sample(models, versions):
+    """Output tokens per sample and whether it is listed for the round, for every (model, version) row.
+
+    Rows of benchmarks missing from ``TOKENS_PER_SAMPLE`` get a missing length.
+    """
+    keys = pd.DataFrame({'model': models.astype(str).to_numpy(), 'version': versions.astype(str).to_numpy()})
+    # One lookup per distinct (model, version)
+    codes, pairs = pd.MultiIndex.from_frame(keys).factorize()
+    found = [_tokens(m, v) for m, v in pairs]
+    lengths = np.array([length for length, _ in found], dtype=float)
+    listed = np.array([listed for _, listed in found], dtype=bool)
+    return lengths[codes], listed[codes]
+
+
+def normalize_tokens(df):
+    """Convert token-rate 'Value's to samples/s and add 'tokens_per_sample' and 'tokens_assumed'.
+
+    ``df`` is a parsed file with 'Units' and 'Value' (see ``units.normalize_units``).
+    'tokens_per_sample' is set for every row of a benchmark and version in
+    ``TOKENS_PER_SAMPLE``, whatever unit it reports in, and for the token rates
+    of its other rounds. Token rates of benchmarks that are not in the table
+    keep their value (see ``mislabeled_tokens``).
+    """
+    if 'version' in df.columns and 'Model MLC' in df.columns:
+        tokens, listed = tokens_per_sample(df['Model MLC'], df['version'])
+    else:
+        tokens, listed = np.full(len(df), np.nan), np.zeros(len(df), dtype=bool)
+    rates = df['Units'].isin(TOKEN_UNITS).to_numpy() & ~np.isnan(tokens)
+    assumed = rates & ~listed
+    tokens = np.where(listed | rates, tokens, np.nan)
+
+    value = df['Value'].to_numpy()
+    df['Value'] = np.where(rates, value * (1 / tokens), value)
+    df['tokens_per_sample'] = tokens
+    df['tokens_assumed'] = assumed
+    return df
+
+
+def mislabeled_tokens(df):
+    """Rows per model reporting a token rate for a benchmark that is not an LLM, most common first."""
+    rows = df.loc[df['Units'].isin(TOKEN_UNITS) & df['tokens_per_sample'].isna(), 'Model MLC']
+    counts = rows.astype(str).value_counts()
+    return counts[counts > 0]
+
+
+def add_compute_metrics(table):
+    """``table`` (a paired efficiency table) with the ``COMPUTE_COLUMNS`` added."""
+    table = table.copy()
+    looked_up = catalog_lookup(table['Model MLC'])
+    for col in looked_up.columns:
+        table[col] = looked_up[col]
+    macs = table['macs_per_sample'].to_numpy()
+    table['J_per_MAC'] = table['J_per_sample'].to_numpy() / macs
+    table['MAC_per_s_per_W'] = table['samples_per_J'].to_numpy() * macs
+    return table
+
+
+def compute_efficiency(division, model_aliases=None, kind=None, versions=None):
+    """``efficiency_table`` of ``division`` with the per-MAC metrics of every submission."""
+    from .join import efficiency_table
+
+    return add_compute_metrics(efficiency_table(division, model_aliases, kind, versions))
+
+
+def rank_hardware(table, by='accelerator_model_name'):
+    """Best MACs per joule of every ``by`` value, with the submission and benchmark that reached it."""
+    rows = table.dropna(subset=[by, 'MAC_per_s_per_W'])
+    best = rows.loc[rows.groupby(by, observed=True)['MAC_per_s_per_W'].idxmax().to_numpy()]
+    columns = [by, 'MAC_per_s_per_W', 'J_per_MAC', 'Public ID', 'Model MLC', 'version']
+    best = best[[c for c in columns if c in best.columns]]
+    return best.sort_values('MAC_per_s_per_W', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rank hardware by energy per multiply-accumulate.')
+    parser.add_argument('--division', action='append', choices=INFERENCE_DIVISIONS,
+                        help='division (repeatable, default: datacenter, edge and tiny)')
+    parser.add_argument('--by', default='accelerator_model_name',
+                        help="column to rank (default: accelerator_model_name, e.g. 'Organization')")
+    parser.add_argument('--limit', type=int, default=20, help='print at most this many rows per division')
+    args = parser.parse_args(argv)
+
+    for division in args.division or INFERENCE_DIVISIONS:
+        ranked = rank_hardware(compute_efficiency(division), args.by).head(args.limit)
+        print(f'== {division}')
+        print(ranked.to_string(index=False) if len(ranked) else 'no rows with a catalog workload')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,22 +3,11 @@
 # Define the root directory
 ROOT_DIR="$(dirname "$0")"
 
-# Delete the 'figures' directory in the root directory if it exists
-if [ -d "$ROOT_DIR/figures" ]; then
-    echo "Removing existing 'figures' directory..."
-    rm -rf "$ROOT_DIR/figures"
-fi
-
-# Create a new empty 'figures' directory in the root directory
+# Create the 'figures' directory in the root directory if it does not exist yet.
+# Figures whose script, inputs and style are unchanged since the last run are
+# skipped; pass --force to regenerate everything.
 mkdir -p "$ROOT_DIR/figures"
-echo "Created new 'figures' directory in the root directory."
 
-# Run all Python files in the /code directory
-for file in "$ROOT_DIR/code"/*.py; do
-    if [ -f "$file" ]; then  # Ensure the file exists
-        echo "Running $file"
-        python "$file"
-    else
-        echo "No Python files found in $ROOT_DIR/code."
-    fi
-done
+# Build all figures in one process pool (see code/mlperf_power/build.py)
+# Extra arguments are passed through, e.g. ./run_all.sh --only fig5a,fig10
+PYTHONPATH="$ROOT_DIR/code${PYTHONPATH:+:$PYTHONPATH}" python -m mlperf_power.build "$@"